@@ -1,19 +1,30 @@
-import time
 import random
 from blessed import Terminal
+from cat_state import StateTable
+from clock import Clock
+from layout import Layout
+
+# Zoomie direction flips per second. This is the 2% chance per update the
+# frame-paced loop had, at 0.5 s per update.
+ZOOMIE_FLIP_RATE = 0.04
 
 
 class Animation:
-    def __init__(self, terminal: Terminal, config: dict):
+    def __init__(
+        self, terminal: Terminal, config: dict, clock=None, states=None, layout=None
+    ):
         self.term = terminal
+        self.layout = layout if layout is not None else Layout(terminal)
         self.config = config
+        self.clock = clock if clock is not None else Clock()
+        self.states = states if states is not None else StateTable(config)
         self.base_animation_speed = config["pet"]["animation_speed"]
         self.base_movement_speed = config["pet"]["movement_speed"]
         self.screen_wrap = config["pet"]["screen_wrap"]
 
         self.frame_index = 0
         self.rainbow_offset = 0
-        self.last_frame_time = time.time()
+        self.last_frame_time = self.clock.now
         self.frame_accumulator = 0
 
         self.cat_x = 35
@@ -31,8 +42,9 @@ class Animation:
 
     def update(self, dt, cat_state=None):
         if cat_state:
-            self._update_speeds_from_state(cat_state)
-            self._handle_state_movement(cat_state)
+            state_id = self.states.index.get(cat_state)
+            self._update_speeds_from_state(state_id)
+            self._handle_state_movement(state_id)
 
         if self.is_paused:
             self.pause_timer -= dt
@@ -44,40 +56,23 @@ class Animation:
         self._update_rainbow(dt)
         self._update_position(dt)
 
-    def _update_speeds_from_state(self, cat_state):
-        from cat_state import CatState
-
-        state_speeds = {
-            CatState.IDLE: (0.5, 0.5),
-            CatState.WALKING: (0.4, 0.7),
-            CatState.EATING: (0.3, 0.0),
-            CatState.SLEEPING: (1.0, 0.0),
-            CatState.GROOMING: (0.25, 0.0),
-            CatState.PLAYING: (0.2, 1.5),
-            CatState.STRETCHING: (0.4, 0.0),
-            CatState.HUNGRY: (0.6, 0.3),
-            CatState.HAPPY: (0.35, 0.6),
-            CatState.SAD: (0.8, 0.2),
-        }
-
-        speeds = state_speeds.get(
-            cat_state, (self.base_animation_speed, self.base_movement_speed)
-        )
-        self.current_animation_speed = speeds[0]
-        self.current_movement_speed = speeds[1]
-
-    def _handle_state_movement(self, cat_state):
-        from cat_state import CatState
-
-        if cat_state == CatState.SLEEPING:
-            if not self.is_paused:
-                self.pause()
-        elif cat_state == CatState.GROOMING:
+    def _update_speeds_from_state(self, state_id):
+        if state_id is None:
+            self.current_animation_speed = self.base_animation_speed
+            self.current_movement_speed = self.base_movement_speed
+        else:
+            self.current_animation_speed = self.states.animation_speed[state_id]
+            self.current_movement_speed = self.states.movement_speed[state_id]
+
+    def _handle_state_movement(self, state_id):
+        motion = "move" if state_id is None else self.states.motion[state_id]
+
+        if motion == "paused":
             if not self.is_paused:
                 self.pause()
-        elif cat_state == CatState.EATING:
+        elif motion == "hold":
             pass
-        elif cat_state == CatState.PLAYING:
+        elif motion == "zoomies":
             self.zoomie_active = True
             self.is_paused = False
         else:
@@ -99,7 +94,7 @@ class Animation:
             self.frame_accumulator = 0
 
     def _update_rainbow(self, dt):
-        self.rainbow_offset = int(time.time() * 3) % 100
+        self.rainbow_offset = int(self.clock.now * 3) % 100
 
     def _update_position(self, dt):
         if self.current_movement_speed == 0:
@@ -108,13 +103,13 @@ class Animation:
         speed = self.current_movement_speed
         if self.zoomie_active:
             speed *= 2
-            if random.random() < 0.02:
+            if random.random() < ZOOMIE_FLIP_RATE * dt:
                 self.direction *= -1
 
         distance = speed * dt
         self.cat_x += distance * self.direction
 
-        screen_width = self.term.width
+        screen_width = self.layout.width
         cat_width = 20
 
         if self.screen_wrap:
@@ -142,3 +137,9 @@ class Animation:
 
     def get_movement_speed(self):
         return self.current_movement_speed
+
+    def get_velocity(self):
+        if self.is_paused:
+            return 0.0
+        speed = self.current_movement_speed * self.direction
+        return speed * 2 if self.zoomie_active else speed
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Colony simulation benchmark: ticks per second versus pet count
+"""
+
+import time
+import yaml
+from colony import Colony
+from stats import Stats
+from animation import Animation
+from cat_state import CatStateMachine
+from clock import Clock
+from virtual_terminal import VirtualTerminal
+
+COUNTS = [1, 10, 100, 1000, 10000, 100000]
+SCALAR_LIMIT = 1000
+TICK = 0.05
+DURATION = 1.0
+
+
+def bench_colony(config, count):
+    colony = Colony(config, count, seed=count)
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        colony.step(TICK)
+        ticks += 1
+    return ticks / (time.perf_counter() - start)
+
+
+def bench_scalar(config, count):
+    term = VirtualTerminal(200, 60)
+    clocks = [Clock() for _ in range(count)]
+    pets = [
+        (
+            clock,
+            Stats(config, clock),
+            CatStateMachine(config, clock),
+            Animation(term, config, clock),
+        )
+        for clock in clocks
+    ]
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        for clock, stats, state_machine, animation in pets:
+            clock.advance(TICK)
+            state_machine.update(TICK, stats.get_stats())
+            animation.update(TICK, state_machine.get_state())
+            stats.update(TICK)
+        ticks += 1
+    return ticks / (time.perf_counter() - start)
+
+
+def run_benchmark():
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    print(
+        f"{'pets':>8} {'colony ticks/s':>15} {'scalar ticks/s':>15} {'pet-ticks/s':>13}"
+    )
+    for count in COUNTS:
+        colony_rate = bench_colony(config, count)
+        scalar = (
+            f"{bench_scalar(config, count):>15.0f}"
+            if count <= SCALAR_LIMIT
+            else f"{'-':>15}"
+        )
+        print(f"{count:>8} {colony_rate:>15.0f} {scalar} {colony_rate * count:>13.2e}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Headless render benchmark across terminal sizes using the virtual terminal
+"""
+
+import time
+import yaml
+from pet import Pet
+from virtual_terminal import VirtualTerminal
+
+SIZES = [(80, 24), (120, 40), (200, 60), (300, 90), (400, 120)]
+FRAMES = 200
+TICK = 0.05
+
+
+def bench_size(config, width, height):
+    term = VirtualTerminal(width, height)
+    pet = Pet(term, config, stream=term)
+
+    pet.render()
+    first = term.take_frame_stats()
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        pet.update(TICK)
+        pet.render()
+    elapsed = time.perf_counter() - start
+    steady = term.take_frame_stats()
+
+    return {
+        "size": f"{width}x{height}",
+        "full_bytes": first["bytes"],
+        "bytes_per_frame": steady["bytes"] / FRAMES,
+        "escapes_per_frame": steady["escapes"] / FRAMES,
+        "ms_per_frame": elapsed / FRAMES * 1000,
+    }
+
+
+def run_benchmark():
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    print(
+        f"{'size':>9} {'full frame':>11} {'bytes/frame':>12} {'esc/frame':>10} {'ms/frame':>9}"
+    )
+    for width, height in SIZES:
+        result = bench_size(config, width, height)
+        print(
+            f"{result['size']:>9} {result['full_bytes']:>11} "
+            f"{result['bytes_per_frame']:>12.0f} {result['escapes_per_frame']:>10.1f} "
+            f"{result['ms_per_frame']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Starfield benchmark: update + draw cost and changed cells versus star count
+"""
+
+import time
+import yaml
+from framebuffer import FrameBuffer
+from starfield import Starfield, load_numpy
+from styles import StyleRegistry
+
+SIZES = [(80, 24), (200, 60), (400, 120)]
+DENSITIES = [0.006, 0.05, 0.2]
+TICK = 0.05
+VELOCITY = 8.0
+DURATION = 0.5
+
+
+def bench_starfield(config, width, height, density, vectorized):
+    config = dict(config, display=dict(config["display"], star_density=density))
+    starfield = Starfield(config, StyleRegistry(), seed=1, vectorized=vectorized)
+    starfield.resize(width, height)
+    buffers = [FrameBuffer(height, width), FrameBuffer(height, width)]
+
+    frames = 0
+    changed = 0
+    busy = 0.0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        buffer = buffers[frames % 2]
+        buffer.clear()
+        tick = time.perf_counter()
+        starfield.update(TICK, VELOCITY)
+        starfield.draw(buffer)
+        busy += time.perf_counter() - tick
+        frames += 1
+        if frames > 1:
+            changed += sum(
+                1 for a, b in zip(buffers[0].chars, buffers[1].chars) if a != b
+            )
+    return {
+        "stars": starfield.count,
+        "us_per_frame": busy / frames * 1e6,
+        "changed_per_frame": changed / max(frames - 1, 1),
+    }
+
+
+def run_benchmark():
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    modes = [False, True] if load_numpy() is not None else [False]
+    print(
+        f"{'size':>9} {'density':>8} {'stars':>6} {'changed/frame':>14} "
+        + " ".join(f"{'numpy us' if mode else 'python us':>10}" for mode in modes)
+    )
+    for width, height in SIZES:
+        for density in DENSITIES:
+            results = [
+                bench_starfield(config, width, height, density, mode) for mode in modes
+            ]
+            print(
+                f"{width}x{height:<5} {density:>8} {results[0]['stars']:>6} "
+                f"{results[0]['changed_per_frame']:>14.0f} "
+                + " ".join(f"{result['us_per_frame']:>10.0f}" for result in results)
+            )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,5 +1,6 @@
-import time
 import random
+from clock import Clock
+from scheduler import Scheduler
 from enum import Enum
 
 
@@ -16,145 +17,248 @@ class CatState(Enum):
     SAD = "sad"
 
 
-class CatStateMachine:
+STATE_BY_NAME = {state.value: state for state in CatState}
+MOTIONS = ("move", "hold", "paused", "zoomies")
+GUARD_OPERATORS = ("<", ">")
+
+
+class StateTable:
+    """``cat_states`` and ``state_machine`` from config compiled into flat
+    tables indexed by state id.
+
+    States listed in config but not in ``CatState`` are represented by their
+    name, so a new state needs only config.
+    """
+
     def __init__(self, config):
+        cat_states = config["cat_states"]
+        behaviors = config["behaviors"]
+        machine = config["state_machine"]
+
+        self.names = list(cat_states)
+        self.states = [STATE_BY_NAME.get(name, name) for name in self.names]
+        self.index = {state: i for i, state in enumerate(self.states)}
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        specs = [cat_states[name] for name in self.names]
+        self.animation_speed = [spec["animation_speed"] for spec in specs]
+        self.movement_speed = [spec["movement_speed"] for spec in specs]
+        self.motion = [spec.get("motion", "move") for spec in specs]
+        for name, motion in zip(self.names, self.motion):
+            if motion not in MOTIONS:
+                raise ValueError(f"Unknown motion '{motion}' for cat state '{name}'")
+
+        self.default = self._id(machine["default"])
+        self.min_state_duration = machine["min_state_duration"]
+
+        # (target, stat, above, threshold, allowed-from bitmask, duration)
+        self.transitions = []
+        for rule in machine["transitions"]:
+            stat, operator, threshold = rule["when"].split()
+            if operator not in GUARD_OPERATORS:
+                raise ValueError(f"Unsupported guard operator in '{rule['when']}'")
+            allowed = (1 << len(self.names)) - 1
+            if "from" in rule:
+                allowed = self._mask(rule["from"])
+            allowed &= ~self._mask(rule.get("not_from", []))
+            self.transitions.append(
+                (
+                    self._id(rule["to"]),
+                    stat,
+                    operator == ">",
+                    self._value(threshold, behaviors),
+                    allowed,
+                    rule.get("duration", 0),
+                )
+            )
+
+        # (target, interval low, interval high, duration)
+        self.random_behaviors = [
+            (
+                self._id(rule["to"]),
+                self._value(rule["interval"][0], behaviors),
+                self._value(rule["interval"][1], behaviors),
+                rule["duration"],
+            )
+            for rule in machine["random_behaviors"]
+        ]
+
+        self.actions = {
+            action: (self._id(rule["to"]), rule.get("duration", 0))
+            for action, rule in machine["actions"].items()
+        }
+
+    def _id(self, name):
+        if name not in self.ids:
+            raise ValueError(f"Unknown cat state '{name}' in state_machine config")
+        return self.ids[name]
+
+    def _mask(self, names):
+        mask = 0
+        for name in names:
+            mask |= 1 << self._id(name)
+        return mask
+
+    def _value(self, value, behaviors):
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                return behaviors[value]
+        return value
+
+
+class CatStateMachine:
+    def __init__(self, config, clock=None, table=None, scheduler=None):
         self.config = config
-        self.current_state = CatState.IDLE
-        self.state_start_time = time.time()
+        self.clock = clock if clock is not None else Clock()
+        self.scheduler = scheduler if scheduler is not None else Scheduler(self.clock)
+        self.table = table if table is not None else StateTable(config)
+        self.state_id = self.table.default
+        self.current_state = self.table.states[self.state_id]
+        self.state_start_time = self.clock.now
         self.state_duration = 0
-        self.min_state_duration = 2.0
+        self.state_timer = None
+        self.state_expired = False
+        self.min_state_duration = self.table.min_state_duration
         self.transition_timer = 0
         self.transition_duration = 0
 
-        self.behavior_timers = {
-            "grooming": 0,
-            "stretching": 0,
-            "zoomies": 0,
-        }
-        self.behavior_intervals = {
-            "grooming": random.uniform(15, 25),
-            "stretching": random.uniform(30, 45),
-            "zoomies": random.uniform(20, 40),
-        }
+        self.behavior_intervals = [
+            random.uniform(low, high) for _, low, high, _ in self.table.random_behaviors
+        ]
+        self.behavior_timers = [
+            self.scheduler.call_later(interval, self._behavior_due, i)
+            for i, interval in enumerate(self.behavior_intervals)
+        ]
+        self.due_behaviors = []
 
     def update(self, dt, stats):
-        self._update_behavior_timers(dt)
+        self.scheduler.run_due()
         self._check_random_behaviors()
         self._update_state_from_stats(stats)
         self._update_state_duration(dt)
 
-    def _update_behavior_timers(self, dt):
-        for key in self.behavior_timers:
-            self.behavior_timers[key] += dt
+    def _behavior_due(self, index):
+        self.due_behaviors.append(index)
+        self.due_behaviors.sort()
 
     def _check_random_behaviors(self):
-        if self._can_change_state():
-            for behavior, timer in self.behavior_timers.items():
-                if timer >= self.behavior_intervals[behavior]:
-                    self._trigger_behavior(behavior)
-                    self.behavior_timers[behavior] = 0
-                    self.behavior_intervals[behavior] = random.uniform(
-                        15 if behavior == "grooming" else 30,
-                        25 if behavior == "grooming" else 45,
-                    )
-                    break
-
-    def _trigger_behavior(self, behavior):
-        if behavior == "grooming":
-            self.change_state(CatState.GROOMING, duration=3.0)
-        elif behavior == "stretching":
-            self.change_state(CatState.STRETCHING, duration=2.5)
-        elif behavior == "zoomies":
-            self.change_state(CatState.PLAYING, duration=4.0)
+        if self.due_behaviors and self._can_change_state():
+            i = self.due_behaviors.pop(0)
+            state_id, low, high, duration = self.table.random_behaviors[i]
+            self._enter(state_id, duration)
+            self.behavior_intervals[i] = random.uniform(low, high)
+            self.behavior_timers[i] = self.scheduler.call_later(
+                self.behavior_intervals[i], self._behavior_due, i
+            )
+
+    def _match_transition(self, state_id, stats):
+        bit = 1 << state_id
+        for target, stat, above, threshold, allowed, duration in self.table.transitions:
+            if allowed & bit:
+                value = stats.get(stat, 50)
+                if value > threshold if above else value < threshold:
+                    return target, duration
+        return None
 
     def _update_state_from_stats(self, stats):
         if not self._can_change_state():
             return
 
-        hunger = stats.get("hunger", 50)
-        mood = stats.get("mood", 50)
-        energy = stats.get("energy", 50)
-
-        if energy < 20 and self.current_state != CatState.SLEEPING:
-            self.change_state(CatState.SLEEPING, duration=5.0)
-        elif hunger < 30 and self.current_state not in [
-            CatState.EATING,
-            CatState.HUNGRY,
-        ]:
-            self.change_state(CatState.HUNGRY)
-        elif mood < 30 and self.current_state not in [CatState.SAD, CatState.SLEEPING]:
-            self.change_state(CatState.SAD)
-        elif mood > 80 and self.current_state == CatState.IDLE:
-            self.change_state(CatState.HAPPY, duration=3.0)
-        elif self.current_state == CatState.SLEEPING and energy > 60:
-            self.change_state(CatState.IDLE)
+        match = self._match_transition(self.state_id, stats)
+        if match is not None:
+            self._enter(*match)
 
-    def _update_state_duration(self, dt):
-        if self.state_duration > 0:
-            elapsed = time.time() - self.state_start_time
-            if elapsed >= self.state_duration:
-                self._return_to_default_state()
+    def fast_forward(self, elapsed, stats):
+        """Jump ``elapsed`` seconds ahead to the state the stats settle into.
 
-    def _can_change_state(self):
+        A timed state that outlasts ``elapsed`` is kept. Otherwise the state
+        is picked by the transition table as seen from the default state,
+        i.e. for a pet left alone, and behavior timers keep their phase.
+        """
+        for i, timer in enumerate(self.behavior_timers):
+            if i in self.due_behaviors:
+                continue
+            interval = self.behavior_intervals[i]
+            progress = interval - (timer.when - self.clock.now)
+            timer.cancel()
+            self.behavior_timers[i] = self.scheduler.call_later(
+                interval - (progress + elapsed) % interval, self._behavior_due, i
+            )
+
+        self.state_start_time -= elapsed
         if self.state_duration > 0:
-            elapsed = time.time() - self.state_start_time
-            if elapsed < self.state_duration:
-                return False
+            if self.clock.now - self.state_start_time < self.state_duration:
+                self.state_timer.cancel()
+                self.state_timer = self.scheduler.call_at(
+                    self.state_start_time + self.state_duration, self._state_due
+                )
+                return
+
+        match = self._match_transition(self.table.default, stats)
+        if match is None:
+            self._enter(self.table.default, 0)
+        else:
+            self._enter(*match)
+
+    def _state_due(self):
+        self.state_expired = True
+
+    def _update_state_duration(self, dt):
+        # Expiry is applied after this tick's transitions, which may replace
+        # the expired state with a stat-driven one.
+        if self.state_expired:
+            self._return_to_default_state()
 
-        elapsed = time.time() - self.state_start_time
+    def _can_change_state(self):
+        elapsed = self.clock.now - self.state_start_time
+        if self.state_duration > 0 and elapsed < self.state_duration:
+            return False
         return elapsed >= self.min_state_duration
 
     def _return_to_default_state(self):
-        self.state_duration = 0
-        self.current_state = CatState.IDLE
-        self.state_start_time = time.time()
+        self._enter(self.table.default, 0)
 
-    def change_state(self, new_state, duration=0):
-        self.current_state = new_state
-        self.state_start_time = time.time()
+    def _enter(self, state_id, duration):
+        self.state_id = state_id
+        self.current_state = self.table.states[state_id]
+        self.state_start_time = self.clock.now
         self.state_duration = duration
+        self.state_expired = False
+        if self.state_timer is not None:
+            self.state_timer.cancel()
+            self.state_timer = None
+        if duration > 0:
+            self.state_timer = self.scheduler.call_later(duration, self._state_due)
+
+    def change_state(self, new_state, duration=0):
+        self._enter(self.table.index[new_state], duration)
 
     def get_state(self):
         return self.current_state
 
+    def get_state_name(self):
+        """The state's config name, also for states without a ``CatState``."""
+        return self.table.names[self.state_id]
+
     def get_animation_speed(self):
-        speeds = {
-            CatState.IDLE: 0.5,
-            CatState.WALKING: 0.4,
-            CatState.EATING: 0.3,
-            CatState.SLEEPING: 1.0,
-            CatState.GROOMING: 0.25,
-            CatState.PLAYING: 0.2,
-            CatState.STRETCHING: 0.4,
-            CatState.HUNGRY: 0.6,
-            CatState.HAPPY: 0.35,
-            CatState.SAD: 0.8,
-        }
-        return speeds.get(self.current_state, 0.5)
+        return self.table.animation_speed[self.state_id]
 
     def get_movement_speed(self):
-        speeds = {
-            CatState.IDLE: 0.5,
-            CatState.WALKING: 0.7,
-            CatState.EATING: 0.0,
-            CatState.SLEEPING: 0.0,
-            CatState.GROOMING: 0.0,
-            CatState.PLAYING: 1.5,
-            CatState.STRETCHING: 0.0,
-            CatState.HUNGRY: 0.3,
-            CatState.HAPPY: 0.6,
-            CatState.SAD: 0.2,
-        }
-        return speeds.get(self.current_state, 0.5)
+        return self.table.movement_speed[self.state_id]
+
+    def on_action(self, action):
+        self._enter(*self.table.actions[action])
 
     def on_feed(self):
-        self.change_state(CatState.EATING, duration=3.0)
+        self.on_action("feed")
 
     def on_play(self):
-        self.change_state(CatState.PLAYING, duration=4.0)
+        self.on_action("play")
 
     def on_pet(self):
-        self.change_state(CatState.HAPPY, duration=2.0)
+        self.on_action("pet")
 
     def on_sleep(self):
-        self.change_state(CatState.SLEEPING, duration=5.0)
+        self.on_action("sleep")
@@ -0,0 +1,14 @@
+class Clock:
+    """Simulation time in seconds, advanced once per tick by the tick's dt.
+
+    Shared by a pet's modules in place of ``time.time()`` so every read in a
+    tick sees the same timestamp and the simulation can run faster than real
+    time or be replayed exactly.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def advance(self, dt):
+        self.now += dt
+        return self.now
@@ -0,0 +1,193 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from animation import ZOOMIE_FLIP_RATE
+from cat_state import StateTable
+from stats import STARVING_HUNGER, STARVING_MOOD_DECAY
+
+CAT_WIDTH = 20
+STATS = ("hunger", "mood", "energy")
+
+
+class Colony:
+    """Struct-of-arrays simulation of many pets advanced in one vectorized step.
+
+    Mirrors ``Stats.update``, ``CatStateMachine.update`` and
+    ``Animation.update`` for every pet at once, with per-pet state clocks
+    accumulated from ``dt`` instead of read from ``time.time()``. States,
+    transitions and random behaviors come from the same ``StateTable``.
+    """
+
+    def __init__(self, config, count, width=200, seed=None):
+        if np is None:
+            raise ImportError("Colony simulation requires numpy (pip install numpy)")
+
+        self.config = config
+        self.count = count
+        self.width = width
+        self.rng = np.random.default_rng(seed)
+        self.table = table = StateTable(config)
+
+        stats = config["stats"]
+        self.hunger_decay = stats["hunger_decay"]
+        self.mood_decay = stats["mood_decay"]
+        self.energy_decay = stats["energy_decay"]
+        self.min_value = stats["min_value"]
+        self.screen_wrap = config["pet"]["screen_wrap"]
+
+        self.hunger = np.full(count, stats["initial_hunger"], dtype=np.float64)
+        self.mood = np.full(count, stats["initial_mood"], dtype=np.float64)
+        self.energy = np.full(count, stats["initial_energy"], dtype=np.float64)
+
+        self.x = self.rng.uniform(-CAT_WIDTH, width, count)
+        self.y = self.rng.integers(0, 30, count)
+        self.direction = self.rng.choice(np.array([-1, 1], dtype=np.int8), count)
+        self.frame_index = np.zeros(count, dtype=np.int64)
+        self.frame_accumulator = np.zeros(count, dtype=np.float64)
+
+        self.state = np.full(count, table.default, dtype=np.int8)
+        self.state_elapsed = np.zeros(count, dtype=np.float64)
+        self.state_duration = np.zeros(count, dtype=np.float64)
+
+        behaviors = table.random_behaviors
+        self.behavior_timers = np.zeros((len(behaviors), count), dtype=np.float64)
+        self.behavior_intervals = np.array(
+            [self.rng.uniform(low, high, count) for _, low, high, _ in behaviors]
+        ).reshape(len(behaviors), count)
+
+        self.animation_speeds = np.array(table.animation_speed)
+        self.movement_speeds = np.array(table.movement_speed)
+        self.paused = self._mask(table, "paused")
+        self.zoomies = self._mask(table, "zoomies")
+
+    @staticmethod
+    def _mask(table, motion):
+        return sum(1 << i for i, name in enumerate(table.motion) if name == motion)
+
+    def _in_states(self, mask):
+        """Which pets are in a state whose bit is set in ``mask``.
+
+        Built from a few comparisons against the shorter of the state list
+        and its complement, which is far cheaper than a per-pet table lookup.
+        """
+        states = range(len(self.table.states))
+        inside = [i for i in states if mask >> i & 1]
+        if len(inside) <= len(states) - len(inside):
+            result = np.zeros(self.count, dtype=bool)
+            for i in inside:
+                result |= self.state == i
+        else:
+            result = np.ones(self.count, dtype=bool)
+            for i in states:
+                if not mask >> i & 1:
+                    result &= self.state != i
+        return result
+
+    def step(self, dt):
+        stats = {name: getattr(self, name).astype(np.int64) for name in STATS}
+
+        self._update_states(dt, stats)
+        self._update_animation(dt)
+        self._update_stats(dt)
+
+    def _can_change(self):
+        return (self.state_elapsed >= self.state_duration) & (
+            self.state_elapsed >= self.table.min_state_duration
+        )
+
+    def _change_state(self, mask, state, duration):
+        if not mask.any():
+            return
+        self.state[mask] = state
+        self.state_elapsed[mask] = 0.0
+        self.state_duration[mask] = duration
+
+    def _update_states(self, dt, stats):
+        self.behavior_timers += dt
+
+        pending = self._can_change()
+        behaviors = self.table.random_behaviors
+        for index, (state, low, high, duration) in enumerate(behaviors):
+            due = pending & (
+                self.behavior_timers[index] >= self.behavior_intervals[index]
+            )
+            if due.any():
+                self._change_state(due, state, duration)
+                self.behavior_timers[index][due] = 0.0
+                self.behavior_intervals[index][due] = self.rng.uniform(
+                    low, high, int(due.sum())
+                )
+                pending &= ~due
+
+        # Match every pet against the rules as of the start of the pass, then
+        # apply, so one transition doesn't feed into the next.
+        pending = self._can_change()
+        matches = []
+        for target, stat, above, threshold, allowed, duration in self.table.transitions:
+            value = stats.get(stat)
+            if value is None:
+                value = np.full(self.count, 50)
+            guard = value > threshold if above else value < threshold
+            match = pending & guard & self._in_states(allowed)
+            pending &= ~match
+            matches.append((match, target, duration))
+        for match, target, duration in matches:
+            self._change_state(match, target, duration)
+
+        self.state_elapsed += dt
+        expired = (self.state_duration > 0) & (
+            self.state_elapsed >= self.state_duration
+        )
+        self._change_state(expired, self.table.default, 0.0)
+
+    def _update_animation(self, dt):
+        state = self.state
+        active = ~self._in_states(self.paused)
+
+        self.frame_accumulator += np.where(active, dt, 0.0)
+        advance = self.frame_accumulator >= self.animation_speeds[state]
+        self.frame_index += advance
+        self.frame_accumulator[advance] = 0.0
+
+        speed = np.where(active, self.movement_speeds[state], 0.0)
+        zoomies = self._in_states(self.zoomies)
+        speed = np.where(zoomies, speed * 2, speed)
+        flip = zoomies & (self.rng.random(self.count) < ZOOMIE_FLIP_RATE * dt)
+        self.direction[flip] *= -1
+
+        distance = speed * dt
+        self.x += distance * self.direction
+
+        if self.screen_wrap:
+            self.x[self.x > self.width] = -CAT_WIDTH
+            self.x[self.x < -CAT_WIDTH] = self.width
+        else:
+            bounce = (self.x > self.width - CAT_WIDTH) | (self.x < 0)
+            self.direction[bounce] *= -1
+            self.x[bounce] += distance[bounce] * self.direction[bounce] * 2
+
+    def _update_stats(self, dt):
+        np.subtract(self.mood, self.mood_decay * dt, out=self.mood)
+        for values, decay in (
+            (self.hunger, self.hunger_decay),
+            (self.energy, self.energy_decay),
+        ):
+            np.subtract(values, decay * dt, out=values)
+            np.maximum(values, self.min_value, out=values)
+        starving = self.hunger < STARVING_HUNGER
+        self.mood[starving] -= self.mood_decay * dt * STARVING_MOOD_DECAY
+        np.maximum(self.mood, self.min_value, out=self.mood)
+
+    def feed(self, mask=None, amount=20):
+        mask = np.ones(self.count, dtype=bool) if mask is None else mask
+        self.hunger[mask] = np.minimum(
+            self.config["stats"]["max_value"], self.hunger[mask] + amount
+        )
+        self._change_state(mask, *self.table.actions["feed"])
+
+    def state_counts(self):
+        states = self.table.states
+        counts = np.bincount(self.state, minlength=len(states))
+        return {state: int(counts[code]) for code, state in enumerate(states)}
@@ -0,0 +1,68 @@
+import marshal
+import os
+from cat_state import StateTable
+
+CACHE_VERSION = 1
+REQUIRED_SECTIONS = (
+    "pet",
+    "display",
+    "stats",
+    "behaviors",
+    "colors",
+    "controls",
+    "cat_states",
+    "state_machine",
+)
+
+
+def cache_path(config_path):
+    directory, name = os.path.split(config_path)
+    return os.path.join(directory, f".{name}.compiled")
+
+
+def validate_config(config):
+    if not isinstance(config, dict):
+        raise ValueError("Config must be a mapping of sections")
+    missing = [section for section in REQUIRED_SECTIONS if section not in config]
+    if missing:
+        raise ValueError(f"Config is missing sections: {', '.join(missing)}")
+    # Compiling the state machine checks every state and transition name.
+    StateTable(config)
+
+
+def load_config(config_path="config.yaml"):
+    """Load ``config_path`` from its compiled cache, parsing YAML on a miss.
+
+    The cache is a marshal file next to the config, keyed by the config's
+    mtime and size, and only ever holds a config that passed validation.
+    PyYAML is imported on a miss only.
+    """
+    stat = os.stat(config_path)
+    key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    compiled_path = cache_path(config_path)
+    try:
+        with open(compiled_path, "rb") as f:
+            cached_key, config = marshal.loads(f.read())
+        if cached_key == key:
+            return config
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    import yaml
+
+    try:
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Error parsing config file: {e}") from e
+    validate_config(config)
+
+    temp_path = compiled_path + ".tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(marshal.dumps((key, config)))
+        os.replace(temp_path, compiled_path)
+    except (OSError, ValueError):
+        # Unwritable directory or a value marshal can't store; stay uncached.
+        pass
+    return config
@@ -67,6 +67,7 @@ def visual_demo():
             sys.stdout.write("".join(output))
             sys.stdout.flush()
 
+            animation.clock.advance(0.016)
             animation.update(0.016)
             frame_count += 1
 
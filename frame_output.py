@@ -0,0 +1,145 @@
+import io
+import os
+import select
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# How long close waits for a pending tail before dropping it.
+CLOSE_TIMEOUT = 1.5
+
+
+class FrameWriter:
+    """Writes whole frames to a terminal fd with one non-blocking ``os.write``.
+
+    A frame that only partially fits is kept as a pending tail; until that
+    tail drains the writer reports not ready, so callers drop frames instead
+    of queueing them behind a slow link.
+    """
+
+    def __init__(self, fd, nonblocking=True):
+        self.fd = fd
+        self.pending = bytearray()
+        self.original_flags = None
+        self.write_calls = 0
+        self.blocked_writes = 0
+        if nonblocking and fcntl is not None:
+            self.original_flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            fcntl.fcntl(fd, fcntl.F_SETFL, self.original_flags | os.O_NONBLOCK)
+
+    def _write(self, data):
+        self.write_calls += 1
+        try:
+            return os.write(self.fd, data)
+        except BlockingIOError:
+            self.blocked_writes += 1
+            return 0
+
+    def ready(self):
+        if self.pending:
+            written = self._write(self.pending)
+            del self.pending[:written]
+        return not self.pending
+
+    def submit(self, frame):
+        if not frame:
+            return 0
+        written = self._write(frame)
+        if written < len(frame):
+            self.pending += memoryview(frame)[written:]
+        return len(frame)
+
+    def _drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.pending.clear()
+                break
+            select.select([], [self.fd], [], remaining)
+            written = self._write(self.pending)
+            del self.pending[:written]
+
+    def suspend(self, timeout=CLOSE_TIMEOUT):
+        """Drain or drop the pending tail and put the fd back in blocking
+        mode. The flag is on the open file description, which stdin and the
+        shell share, so clear it before the job stops."""
+        self._drain(timeout)
+        if self.original_flags is not None:
+            fcntl.fcntl(self.fd, fcntl.F_SETFL, self.original_flags)
+
+    def resume(self):
+        if self.original_flags is not None:
+            fcntl.fcntl(self.fd, fcntl.F_SETFL, self.original_flags | os.O_NONBLOCK)
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Drain the pending tail for up to ``timeout`` seconds, then drop
+        what is left (a stopped pager or hung link never drains) and restore
+        the fd's original flags."""
+        self.suspend(timeout)
+        self.original_flags = None
+
+
+class StreamFrameWriter:
+    """Frame writer for file-like streams such as tests and virtual terminals."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def ready(self):
+        return True
+
+    def submit(self, frame):
+        if not frame:
+            return 0
+        if isinstance(self.stream, io.TextIOBase):
+            self.stream.write(frame.decode("utf-8"))
+        else:
+            self.stream.write(bytes(frame))
+        self.stream.flush()
+        return len(frame)
+
+    def suspend(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullFrameWriter:
+    """Frame writer that discards output, for headless and render-less runs."""
+
+    def ready(self):
+        return True
+
+    def submit(self, frame):
+        return len(frame)
+
+    def suspend(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_frame_writer(stream=None):
+    if hasattr(stream, "submit") and hasattr(stream, "ready"):
+        return stream
+    if stream is not None:
+        return StreamFrameWriter(stream)
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return StreamFrameWriter(sys.stdout)
+    sys.stdout.flush()
+    return FrameWriter(fd)
@@ -0,0 +1,79 @@
+import time
+from collections import deque
+
+PHASES = ("simulate", "compose", "encode", "write")
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+class FrameTimer:
+    """Per-phase frame timing that does no clock reads while disabled."""
+
+    def __init__(self, window=240, clock=time.perf_counter):
+        self.clock = clock
+        self.enabled = False
+        self.samples = {phase: deque(maxlen=window) for phase in PHASES + ("total",)}
+        self.frame_bytes = deque(maxlen=window)
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.mark = 0.0
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            for samples in self.samples.values():
+                samples.clear()
+            self.frame_bytes.clear()
+            self.current = dict.fromkeys(PHASES, 0.0)
+
+    def begin(self):
+        if self.enabled:
+            self.mark = self.clock()
+
+    def lap(self, phase):
+        if self.enabled:
+            now = self.clock()
+            self.current[phase] += now - self.mark
+            self.mark = now
+
+    def end_frame(self, bytes_written):
+        if not self.enabled:
+            return
+        total = 0.0
+        for phase in PHASES:
+            elapsed = self.current[phase]
+            self.samples[phase].append(elapsed)
+            self.current[phase] = 0.0
+            total += elapsed
+        self.samples["total"].append(total)
+        self.frame_bytes.append(bytes_written)
+
+    def summary(self):
+        rows = []
+        for phase in PHASES + ("total",):
+            samples = self.samples[phase]
+            ordered = sorted(samples)
+            rows.append(
+                (
+                    phase,
+                    samples[-1] * 1000 if samples else 0.0,
+                    percentile(ordered, 0.50) * 1000,
+                    percentile(ordered, 0.95) * 1000,
+                    percentile(ordered, 0.99) * 1000,
+                )
+            )
+        ordered_bytes = sorted(self.frame_bytes)
+        rows.append(
+            (
+                "bytes",
+                self.frame_bytes[-1] if self.frame_bytes else 0,
+                percentile(ordered_bytes, 0.50),
+                percentile(ordered_bytes, 0.95),
+                percentile(ordered_bytes, 0.99),
+            )
+        )
+        return rows
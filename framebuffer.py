@@ -0,0 +1,137 @@
+import hashlib
+from array import array
+from wcwidth import wcwidth
+
+SPACE = ord(" ")
+CONTINUATION = 0
+
+
+class FrameBuffer:
+    """Screen-sized codepoint and style-id planes reused across frames."""
+
+    __slots__ = (
+        "height",
+        "width",
+        "chars",
+        "styles",
+        "marks",
+        "blank_chars",
+        "blank_styles",
+    )
+
+    def __init__(self, height, width):
+        self.height = -1
+        self.width = -1
+        self.resize(height, width)
+
+    def resize(self, height, width):
+        if height == self.height and width == self.width:
+            return False
+        self.height = height
+        self.width = width
+        size = height * width
+        self.blank_chars = array("I", [SPACE]) * size
+        self.blank_styles = array("H", [0]) * size
+        self.chars = array("I", self.blank_chars)
+        self.styles = array("H", self.blank_styles)
+        self.marks = {}
+        return True
+
+    def clear(self):
+        self.chars[:] = self.blank_chars
+        self.styles[:] = self.blank_styles
+        if self.marks:
+            self.marks.clear()
+
+    def copy_from(self, other):
+        self.resize(other.height, other.width)
+        self.chars[:] = other.chars
+        self.styles[:] = other.styles
+        self.marks.clear()
+        self.marks.update(other.marks)
+
+    def digest(self, size=8):
+        h = hashlib.blake2b(digest_size=size)
+        h.update(self.chars)
+        h.update(self.styles)
+        for index in sorted(self.marks):
+            h.update(f"{index}:{self.marks[index]}".encode("utf-8"))
+        return h.digest()
+
+    def put(self, y, x, codepoint, style=0):
+        if 0 <= y < self.height and 0 <= x < self.width:
+            index = y * self.width + x
+            self.chars[index] = codepoint
+            self.styles[index] = style
+
+    def blit_sprite(self, x, y, rows):
+        height = self.height
+        width = self.width
+        chars = self.chars
+        styles = self.styles
+        for line_index, row in enumerate(rows):
+            line_y = y + line_index
+            if not 0 <= line_y < height:
+                continue
+            base = line_y * width
+            for offset, codepoint, style in row:
+                pos_x = x + offset
+                if 0 <= pos_x < width:
+                    chars[base + pos_x] = codepoint
+                    styles[base + pos_x] = style
+
+    def blit_text(self, y, x, text, style=0):
+        if not 0 <= y < self.height:
+            return x
+        width = self.width
+        base = y * width
+        chars = self.chars
+        styles = self.styles
+        col = x
+        for char in text:
+            char_width = wcwidth(char)
+            if char_width < 0:
+                continue
+            if char_width == 0:
+                if 0 < col <= width:
+                    index = base + col - 1
+                    self.marks[index] = self.marks.get(index, "") + char
+                continue
+            if 0 <= col < width:
+                chars[base + col] = ord(char)
+                styles[base + col] = style
+                self.marks.pop(base + col, None)
+                if char_width == 2 and col + 1 < width:
+                    chars[base + col + 1] = CONTINUATION
+                    styles[base + col + 1] = style
+            col += char_width
+        return col
+
+    def blit_bar(
+        self, y, x, filled, total, fill_style, empty_style, fill="█", empty="░"
+    ):
+        if not 0 <= y < self.height:
+            return x
+        filled = max(0, min(total, filled))
+        width = self.width
+        base = y * width
+        fill_code = ord(fill)
+        empty_code = ord(empty)
+        for i in range(total):
+            col = x + i
+            if 0 <= col < width:
+                if i < filled:
+                    self.chars[base + col] = fill_code
+                    self.styles[base + col] = fill_style
+                else:
+                    self.chars[base + col] = empty_code
+                    self.styles[base + col] = empty_style
+        return x + total
+
+    def cell_text(self, index):
+        codepoint = self.chars[index]
+        if codepoint == CONTINUATION:
+            return ""
+        if self.marks and index in self.marks:
+            return chr(codepoint) + self.marks[index]
+        return chr(codepoint)
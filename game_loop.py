@@ -0,0 +1,215 @@
+import math
+import time
+from collections import deque
+
+MAX_FRAME_TIME = 0.25
+RATE_WINDOW = 1.0
+TIME_EPSILON = 1e-9
+
+
+def never_idle():
+    return False
+
+
+class GameLoop:
+    """Fixed-timestep simulation with separately paced, frame-skipping rendering."""
+
+    def __init__(
+        self,
+        tick_rate=20,
+        render_fps=30,
+        max_ticks_per_frame=5,
+        idle_fps=2,
+        time_warp=1.0,
+        clock=time.monotonic,
+    ):
+        self.tick_interval = 1.0 / tick_rate
+        self.render_interval = 1.0 / render_fps
+        self.idle_interval = 1.0 / idle_fps
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.time_warp = time_warp
+        self.clock = clock
+        self.running = False
+        self.wakeup = None
+        self.suspended = False
+        self.suspended_since = 0.0
+        self.suspended_time = 0.0
+        self.resumed = False
+
+        self.accumulator = 0.0
+        self.previous = 0.0
+        self.next_render = 0.0
+        self.tick_count = 0
+        self.render_count = 0
+        self.skipped_frames = 0
+        self.dropped_ticks = 0
+        self.wakeups = 0
+        self.tick_times = deque()
+        self.render_times = deque()
+
+    @classmethod
+    def from_config(cls, config, time_warp=1.0):
+        return cls(
+            tick_rate=config["pet"]["tick_rate"],
+            render_fps=config["display"]["target_fps"],
+            max_ticks_per_frame=config["display"]["max_frame_skip"],
+            idle_fps=config["display"]["idle_fps"],
+            time_warp=time_warp,
+        )
+
+    def stop(self):
+        self.running = False
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def request_render(self):
+        self.next_render = min(self.next_render, self.clock())
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def suspend(self):
+        """Stop rendering while the display is hidden; ticks keep running,
+        batched at ``idle_interval``."""
+        if not self.suspended:
+            self.suspended = True
+            self.suspended_since = self.clock()
+
+    def resume(self):
+        if self.suspended:
+            self.suspended = False
+            self.resumed = True
+            self.suspended_time += self.clock() - self.suspended_since
+            self.request_render()
+
+    def skip_elapsed(self):
+        """Return the simulated seconds since the last advance and drop them
+        from the loop, for a caller that fast-forwards over a stopped process."""
+        now = self.clock()
+        elapsed = (now - self.previous) * self.time_warp
+        self.previous = now
+        return elapsed
+
+    def run(self, simulate, render, wait):
+        self._start()
+        while self.running:
+            timeout = self._advance(simulate, render)
+            wait(max(0.0, timeout))
+
+    async def run_async(self, simulate, render, idle=None, deadline=None):
+        """Run until stopped, sleeping between deadlines instead of polling.
+
+        ``idle`` reports when nothing on screen moves, which stretches the
+        render interval to ``idle_interval`` and batches the ticks that fell
+        due in between. ``deadline`` returns the seconds until the next timed
+        change (or None), which is rendered as soon as a tick has seen it.
+        Callbacks such as input readers wake the loop with ``request_render``.
+        """
+        import asyncio
+
+        self.wakeup = asyncio.Event()
+        self._start()
+        try:
+            while self.running:
+                timeout = self._advance(simulate, render, idle)
+                pending = deadline() if deadline is not None else None
+                if pending is not None and not self.suspended:
+                    pending = max(pending, 0.0) + self.tick_interval
+                    due = self.clock() + pending / self.time_warp
+                    if due < self.next_render:
+                        self.next_render = due
+                        timeout = min(timeout, due - self.clock())
+                if not self.running:
+                    break
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), max(0.0, timeout))
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                self.wakeups += 1
+        finally:
+            self.wakeup = None
+
+    def _start(self):
+        self.running = True
+        self.previous = self.clock()
+        self.next_render = self.previous
+
+    def _advance(self, simulate, render, idle=None):
+        if idle is None:
+            idle = never_idle
+        # The advance after a resume still batches the suspended interval.
+        suspended = self.suspended
+        was_idle = suspended or self.resumed or idle()
+        self.resumed = False
+        max_elapsed = MAX_FRAME_TIME
+        max_ticks = self.max_ticks_per_frame
+        if was_idle:
+            render_interval = self.idle_interval
+            max_elapsed += render_interval
+            max_ticks += math.ceil(render_interval / self.tick_interval)
+        else:
+            render_interval = self.render_interval
+
+        # The accumulator is in simulated seconds; time_warp scales how
+        # many of them each real second is worth.
+        max_ticks = math.ceil(max_ticks * self.time_warp)
+        now = self.clock()
+        self.accumulator += min(now - self.previous, max_elapsed) * self.time_warp
+        self.previous = now
+
+        ticks = 0
+        while self.running and self.accumulator >= self.tick_interval - TIME_EPSILON:
+            if ticks >= max_ticks:
+                dropped = int(self.accumulator / self.tick_interval)
+                self.dropped_ticks += dropped
+                self.accumulator -= dropped * self.tick_interval
+                break
+            simulate(self.tick_interval)
+            self.accumulator -= self.tick_interval
+            self.tick_count += 1
+            ticks += 1
+            self._mark(self.tick_times, now)
+
+        now = self.clock()
+        if suspended:
+            if now >= self.next_render - TIME_EPSILON:
+                self.next_render = now + render_interval
+            return self.next_render - self.clock()
+
+        if was_idle and not idle():
+            render_interval = self.render_interval
+            self.next_render = min(self.next_render, now)
+
+        if now >= self.next_render - TIME_EPSILON:
+            render()
+            self.render_count += 1
+            self._mark(self.render_times, now)
+            self.next_render += render_interval
+            if self.next_render <= now:
+                skipped = int((now - self.next_render) / render_interval) + 1
+                self.skipped_frames += skipped
+                self.next_render += skipped * render_interval
+
+        if was_idle and idle():
+            return self.next_render - self.clock()
+        next_tick = (
+            self.previous + (self.tick_interval - self.accumulator) / self.time_warp
+        )
+        return min(next_tick, self.next_render) - self.clock()
+
+    def _mark(self, times, now):
+        times.append(now)
+        while times and now - times[0] > RATE_WINDOW:
+            times.popleft()
+
+    def get_rates(self):
+        return {
+            "tick_rate": len(self.tick_times) / RATE_WINDOW,
+            "render_rate": len(self.render_times) / RATE_WINDOW,
+            "ticks": self.tick_count,
+            "frames": self.render_count,
+            "skipped_frames": self.skipped_frames,
+            "dropped_ticks": self.dropped_ticks,
+            "wakeups": self.wakeups,
+            "suspended_time": self.suspended_time,
+        }
@@ -1,276 +1,36 @@
 from blessed import Terminal
-import random
 from cat_state import CatState
+from starfield import Starfield
+from sprite_assets import SPRITE_DIR, RAINBOW, FACE, SpriteLibrary
+from styles import StyleRegistry
+from wcwidth import wcswidth
 
 
 class Graphics:
-    def __init__(self, terminal: Terminal, config: dict):
+    # Compiled sprites are read-only and shared by every instance.
+    sprites = None
+
+    def __init__(
+        self, terminal: Terminal, config: dict, styles=None, sprite_cache=None
+    ):
         self.term = terminal
         self.config = config
         self.colors = config["colors"]
-
-        self.cat_frames = self._generate_all_cat_frames()
-        self.stars = []
-        self._init_stars()
-
-    def _generate_all_cat_frames(self):
-        return {
-            CatState.IDLE: self._generate_idle_frames(),
-            CatState.WALKING: self._generate_walking_frames(),
-            CatState.EATING: self._generate_eating_frames(),
-            CatState.SLEEPING: self._generate_sleeping_frames(),
-            CatState.GROOMING: self._generate_grooming_frames(),
-            CatState.PLAYING: self._generate_playing_frames(),
-            CatState.STRETCHING: self._generate_stretching_frames(),
-            CatState.HUNGRY: self._generate_hungry_frames(),
-            CatState.HAPPY: self._generate_happy_frames(),
-            CatState.SAD: self._generate_sad_frames(),
-        }
-
-    def _generate_idle_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( o.o )    ",
-            "    > ^ <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( -.- )    ",
-            "    > o <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-        ]
-        return self._normalize_frames([frame1, frame2, frame1, frame2])
-
-    def _generate_walking_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( o.o )    ",
-            "    > ^ <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     / \\      ",
-            "    /   \\     ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( o.o )    ",
-            "    > ^ <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "    /   \\     ",
-            "   /     \\    ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_eating_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( ^o^ )    ",
-            "    > w <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-            "   [ FOOD ]   ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( owo )    ",
-            "    > ~ <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-            "   [ FOOD ]   ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_sleeping_frames(self):
-        frame1 = [
-            "   __.---.__  ",
-            "  /   - -   \\ ",
-            " (   -   -   )",
-            "  \\___-___/   ",
-            "   |     |    ",
-        ]
-        frame2 = [
-            "   __.---.__  ",
-            "  /   - -   \\ ",
-            " (   -   -   )",
-            "  \\___-___/   ",
-            "   |  z  |    ",
-        ]
-        frame3 = [
-            "   __.---.__  ",
-            "  /   - -   \\ ",
-            " (   -   -   )",
-            "  \\___-___/   ",
-            "   | z Z |    ",
-        ]
-        return self._normalize_frames([frame1, frame2, frame3, frame2])
-
-    def _generate_grooming_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( o.o )    ",
-            "    > ^ <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_^^_ /    ",
-            "    | |       ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( -.- )    ",
-            "    > w <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_^^_ /    ",
-            "    | |       ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_playing_frames(self):
-        frame1 = [
-            "     /\\_/\\    ",
-            "    ( ^o^ )   ",
-            "     >  <     ",
-            "    /    \\    ",
-            "   (      )   ",
-            "    \\____/    ",
-            "      \\/     ",
-            "      /\\      ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( >w< )    ",
-            "    > ^^<     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     /\\      ",
-            "    /  \\     ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_stretching_frames(self):
-        frame1 = [
-            "       /\\_/\\     ",
-            "      ( -.- )    ",
-            "       >   <     ",
-            "      /     \\    ",
-            "     (       )   ",
-            "      \\_____/    ",
-            "       | |       ",
-        ]
-        frame2 = [
-            "        /\\_/\\    ",
-            "       ( o.o )   ",
-            "        > ~ <    ",
-            "       /     \\   ",
-            "      (       )  ",
-            "       \\_____/   ",
-            "        | |      ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_hungry_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( . . )    ",
-            "    > ~ <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( . . )    ",
-            "    > - <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_happy_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( ^w^ )    ",
-            "    > ^^<     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-            "   ~~~~~~~~   ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( >w< )    ",
-            "    > ^^<     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-            "   ~~~~~~~~   ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _generate_sad_frames(self):
-        frame1 = [
-            "    /\\_/\\     ",
-            "   ( T_T )    ",
-            "    >   <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-        ]
-        frame2 = [
-            "    /\\_/\\     ",
-            "   ( ;_; )    ",
-            "    >   <     ",
-            "   /     \\    ",
-            "  (       )   ",
-            "   \\_____/    ",
-            "     | |      ",
-        ]
-        return self._normalize_frames([frame1, frame2])
-
-    def _normalize_frames(self, frames):
-        max_width = max(len(line) for frame in frames for line in frame)
-        max_height = max(len(frame) for frame in frames)
-        normalized = []
-        for frame in frames:
-            while len(frame) < max_height:
-                frame.append(" " * max_width)
-            normalized_frame = [line.ljust(max_width) for line in frame]
-            normalized.append(normalized_frame)
-        return normalized
-
-    def _init_stars(self):
-        num_stars = self.config["display"]["background_stars"]
-        for _ in range(num_stars):
-            self.stars.append(
-                {
-                    "x": random.randint(0, 100),
-                    "y": random.randint(0, 30),
-                    "color": random.choice(self.colors["star_colors"]),
-                    "twinkle_speed": random.uniform(0.5, 2.0),
-                    "type": random.choice([".", "+", "*"]),
-                }
-            )
+        self.styles = (
+            styles if styles is not None else StyleRegistry.for_terminal(terminal)
+        )
+
+        self.cat_frames = self.load_sprites().frames
+        self.sprite_cache = sprite_cache if sprite_cache is not None else {}
+        self.sprite_cache_hits = 0
+        self.sprite_cache_misses = 0
+        self.starfield = Starfield(config, self.styles)
+
+    @classmethod
+    def load_sprites(cls, directory=SPRITE_DIR):
+        if cls.sprites is None or cls.sprites.directory != directory:
+            cls.sprites = SpriteLibrary(directory)
+        return cls.sprites
 
     def get_rainbow_color(self, position, offset):
         rainbow_colors = self.colors["rainbow_gradient"]
@@ -282,50 +42,130 @@ class Graphics:
         frame = state_frames[frame_index % len(state_frames)]
         return frame
 
-    def colorize_char(self, char, line_index, char_index, rainbow_offset):
-        if char == " ":
-            return char
-        elif char in [
-            "\\",
-            "/",
-            "|",
-            "_",
-            "-",
-            "~",
-            "^",
-            "(",
-            ")",
-            "[",
-            "]",
-            "{",
-            "}",
-            ".",
-            "+",
-            "*",
-        ]:
-            rainbow_pos = line_index + char_index
-            color_num = self.get_rainbow_color(rainbow_pos, rainbow_offset)
-            return self.term.color(color_num) + char + self.term.normal
-        elif line_index < 3:
-            return self.term.color(self.colors["face_color"]) + char + self.term.normal
+    def render_cat_cells(self, frame_index, rainbow_offset, cat_state=CatState.IDLE):
+        state_rows = self.sprites.rows.get(cat_state)
+        if state_rows is None:
+            cat_state = CatState.IDLE
+            state_rows = self.sprites.rows[cat_state]
+        frame_slot = frame_index % len(state_rows)
+        offset_slot = rainbow_offset % len(self.colors["rainbow_gradient"])
+        key = (cat_state, frame_slot, offset_slot)
+
+        cells = self.sprite_cache.get(key)
+        if cells is not None:
+            self.sprite_cache_hits += 1
+            return cells
+
+        self.sprite_cache_misses += 1
+        cells = tuple(
+            tuple(
+                (
+                    char_index,
+                    codepoint,
+                    self.styles.style(
+                        fg=self._role_color(role, line_index + char_index, offset_slot)
+                    ),
+                )
+                for char_index, codepoint, role in row
+            )
+            for line_index, row in enumerate(state_rows[frame_slot])
+        )
+        self.sprite_cache[key] = cells
+        return cells
+
+    def _role_color(self, role, position, rainbow_offset):
+        if role == RAINBOW:
+            return self.get_rainbow_color(position, rainbow_offset)
+        elif role == FACE:
+            return self.colors["face_color"]
         else:
-            return self.term.color(self.colors["body_color"]) + char + self.term.normal
+            return self.colors["body_color"]
+
+    def get_sprite_cache_stats(self):
+        lookups = self.sprite_cache_hits + self.sprite_cache_misses
+        return {
+            "entries": len(self.sprite_cache),
+            "hits": self.sprite_cache_hits,
+            "misses": self.sprite_cache_misses,
+            "hit_rate": self.sprite_cache_hits / lookups if lookups else 0.0,
+        }
+
+    def draw_cat(self, buffer, x, y, frame_index, rainbow_offset, cat_state):
+        buffer.blit_sprite(
+            x, y, self.render_cat_cells(frame_index, rainbow_offset, cat_state)
+        )
+
+    def resize(self, width, height):
+        self.starfield.resize(width, height)
+
+    def draw_stars(self, buffer):
+        self.starfield.draw(buffer)
+
+    def draw_rainbow_tail(self, buffer, x, y, length, rainbow_offset):
+        tail_code = ord("=")
+        for i in range(length):
+            color_num = self.get_rainbow_color(i, rainbow_offset)
+            wave = int(2 * (i % 3 - 1))
+            buffer.put(
+                y + 4 + wave,
+                x - i - 16,
+                tail_code,
+                self.styles.style(fg=color_num),
+            )
+
+    def draw_stats(self, buffer, y, hunger, mood, energy, status=None):
+        gradient = self.colors["rainbow_gradient"]
+        bold = self.styles.style(bold=True)
+
+        buffer.blit_text(y, 0, "NYAN CAT STATUS", bold)
+        if status:
+            buffer.blit_text(y, 18, status, self.styles.style(dim=True))
+        bars = [
+            ("Hunger", hunger, gradient[0]),
+            ("Mood", mood, gradient[3]),
+            ("Energy", energy, gradient[5]),
+        ]
+        for i, (label, value, color) in enumerate(bars):
+            row = y + 1 + i
+            x = buffer.blit_text(row, 0, f"{label}: ")
+            x = buffer.blit_bar(
+                row,
+                x,
+                int(value / 10),
+                10,
+                self.styles.style(fg=color),
+                self.styles.style(fg=color, dim=True),
+            )
+            buffer.blit_text(row, x, f" {value}%")
+        buffer.blit_text(y + 4, 0, "Press [h] for help", self.styles.style(dim=True))
+
+    def draw_help(self, buffer, y):
+        help_lines = self.render_help()
+        buffer.blit_text(y, 0, "CONTROLS:", self.styles.style(bold=True))
+        for i, line in enumerate(help_lines[1:]):
+            buffer.blit_text(y + 1 + i, 0, line)
+
+    def draw_timing(self, buffer, y, x, rows):
+        bold = self.styles.style(bold=True)
+        buffer.blit_text(y, x, "FRAME TIMING (ms)   last   p50   p95   p99", bold)
+        for i, (phase, last, p50, p95, p99) in enumerate(rows):
+            if phase == "bytes":
+                line = f"{'bytes/frame':<18}{last:>6}{p50:>6}{p95:>6}{p99:>6}"
+            else:
+                line = f"{phase:<18}{last:>6.2f}{p50:>6.2f}{p95:>6.2f}{p99:>6.2f}"
+            buffer.blit_text(y + 1 + i, x, line, self.styles.style(dim=True))
+
+    def draw_message(self, buffer, y, message):
+        x = max(0, (buffer.width - wcswidth(message)) // 2)
+        buffer.blit_text(y, x, message, self.styles.style(bold=True))
 
     def render_stars(self):
-        rendered = []
-        for star in self.stars:
-            brightness = random.random() > 0.3
-            if brightness:
-                color_num = star["color"]
-                star_char = star["type"]
-                rendered.append(
-                    (
-                        star["y"],
-                        star["x"],
-                        self.term.color(color_num) + star_char + self.term.normal,
-                    )
-                )
-        return rendered
+        if not self.starfield.count:
+            self.resize(self.term.width, self.term.height)
+        return [
+            (y, x, self.term.color(color) + glyph + self.term.normal)
+            for y, x, glyph, color in self.starfield.visible()
+        ]
 
     def render_rainbow_tail(self, x, y, length, rainbow_offset):
         tail_segments = []
@@ -370,6 +210,7 @@ class Graphics:
             f"[{controls['pet_key']}] Pet   - Increase mood",
             f"[{controls['sleep_key']}] Sleep - Restore energy",
             f"[{controls['help_key']}] Help  - Show this menu",
+            f"[{controls['timing_key']}] Perf  - Toggle frame timing overlay",
             f"[{controls['quit_key']}] Quit  - Exit",
         ]
         return help_lines
@@ -1,17 +1,22 @@
 from blessed import Terminal
-import time
+from clock import Clock
+from scheduler import Scheduler
 
 
 class Interaction:
-    def __init__(self, terminal: Terminal, config: dict):
+    def __init__(self, terminal: Terminal, config: dict, clock=None, scheduler=None):
         self.term = terminal
         self.config = config
+        self.clock = clock if clock is not None else Clock()
+        self.scheduler = scheduler if scheduler is not None else Scheduler(self.clock)
         self.controls = config["controls"]
 
         self.message = ""
         self.message_time = 0
         self.message_duration = 2.0
+        self.message_timer = None
         self.show_help = False
+        self.show_timing = False
 
     def handle_key(self, key, pet_stats):
         if key is None:
@@ -40,6 +45,13 @@ class Interaction:
             self._show_message("Help toggled" if self.show_help else "Help hidden")
             return "help"
 
+        elif key_lower == self.controls["timing_key"]:
+            self.show_timing = not self.show_timing
+            self._show_message(
+                "Frame timing shown" if self.show_timing else "Frame timing hidden"
+            )
+            return "timing"
+
         elif key_lower == self.controls["quit_key"]:
             return "quit"
 
@@ -47,11 +59,24 @@ class Interaction:
 
     def _show_message(self, message):
         self.message = message
-        self.message_time = time.time()
+        self.message_time = self.clock.now
+        if self.message_timer is not None:
+            self.message_timer.cancel()
+        self.message_timer = self.scheduler.call_later(
+            self.message_duration, self._expire_message
+        )
+
+    def _expire_message(self):
+        self.message = ""
+        self.message_timer = None
 
     def update(self, dt):
-        if time.time() - self.message_time > self.message_duration:
-            self.message = ""
+        self.scheduler.run_due()
+
+    def message_expires_in(self):
+        if self.message_timer is None:
+            return None
+        return self.message_timer.when - self.clock.now
 
     def get_message(self):
         return self.message
@@ -59,5 +84,8 @@ class Interaction:
     def is_help_visible(self):
         return self.show_help
 
+    def is_timing_visible(self):
+        return self.show_timing
+
     def get_controls(self):
         return self.controls
@@ -0,0 +1,48 @@
+from collections import namedtuple
+from blessed import Terminal
+
+STATS_LINES = 5
+HELP_ROW = 2
+HELP_LINES = 8
+TIMING_WIDTH = 46
+TIMING_LINES = 7
+
+Region = namedtuple("Region", ["top", "left", "height", "width"])
+
+
+class Layout:
+    """Cached terminal size and the screen regions laid out for it.
+
+    On a real terminal every ``width``/``height`` read is an ioctl, so the
+    size is read only by ``refresh``, which the runtime calls when the
+    terminal reports a resize (SIGWINCH, telnet NAWS, a recorded resize).
+    """
+
+    def __init__(self, terminal: Terminal):
+        self.term = terminal
+        self.width = -1
+        self.height = -1
+        self.resizes = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the terminal size and return True if it changed."""
+        width = self.term.width
+        height = self.term.height
+        if width == self.width and height == self.height:
+            return False
+
+        self.width = width
+        self.height = height
+        self.resizes += 1
+
+        stats_top = height - STATS_LINES - 1
+        self.stats = Region(stats_top, 0, STATS_LINES, width)
+        self.indicator = Region(stats_top - 2, 0, 1, width)
+        self.message = Region(stats_top - 3, 0, 1, width)
+        self.field = Region(0, 0, max(0, stats_top - 3), width)
+        self.help = Region(HELP_ROW, 0, HELP_LINES, width)
+        self.timing = Region(
+            0, max(0, width - TIMING_WIDTH), TIMING_LINES, min(width, TIMING_WIDTH)
+        )
+        return True
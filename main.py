@@ -1,33 +1,226 @@
-import yaml
 import time
+
+STARTED = time.perf_counter()
+
+# Modules the first frame doesn't need (asyncio, PyYAML, saving, recording,
+# headless mode) are imported where they are used.
+import argparse
+import os
+import signal
+import termios
 import sys
 from blessed import Terminal
+from config_cache import load_config as load_compiled_config
 from pet import Pet
+from game_loop import GameLoop
+
+REPORT_INTERVAL = 3600.0
+
+SMCUP = "\x1b[?1049h"
+RMCUP = "\x1b[?1049l"
+FOCUS_REPORTING_ON = "\x1b[?1004h"
+FOCUS_REPORTING_OFF = "\x1b[?1004l"
+# blessed has no keycodes for these, so they arrive as CSI then a letter.
+FOCUS_EVENTS = {"I": True, "O": False}
 
 
 def load_config(config_path="config.yaml"):
     try:
-        with open(config_path, "r") as f:
-            return yaml.safe_load(f)
+        return load_compiled_config(config_path)
     except FileNotFoundError:
         print(f"Config file not found: {config_path}")
         return None
-    except yaml.YAMLError as e:
-        print(f"Error parsing config file: {e}")
+    except ValueError as e:
+        print(e)
         return None
 
 
+class StartupProfile:
+    """Wall time of each startup phase, measured from when main.py started."""
+
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = [
+            f"{phase:<12}{seconds * 1000:8.1f} ms" for phase, seconds in self.phases
+        ]
+        lines.append(
+            f"{'first frame':<12}{(self.last - self.start) * 1000:8.1f} ms total"
+        )
+        return lines
+
+
+async def run_pet(term, pet, loop):
+    """Drive ``pet`` until quit, rendering only while the terminal is shown.
+
+    Focus-out reports (tmux forwards them for background windows) and
+    Ctrl+Z suspend rendering; the simulation keeps ticking while unfocused
+    and is fast-forwarded over the time the process was stopped. Showing
+    the pet again repaints the whole screen.
+    """
+    import asyncio
+
+    events = asyncio.get_running_loop()
+    keyboard = sys.stdin.fileno()
+    tty_mode = []
+
+    def show():
+        loop.resume()
+        pet.invalidate()
+
+    def read_keys():
+        key = term.inkey(timeout=0)
+        while key:
+            if key == "\x1b[":
+                follow = term.inkey(timeout=0)
+                if follow in FOCUS_EVENTS:
+                    if FOCUS_EVENTS[follow]:
+                        show()
+                    else:
+                        loop.suspend()
+                    key = term.inkey(timeout=0)
+                    continue
+                key = follow or key
+            if pet.handle_input(key) == "quit":
+                loop.stop()
+                return
+            key = term.inkey(timeout=0)
+        loop.request_render()
+
+    def stop_job():
+        loop.suspend()
+        # Hand the shell a blocking tty while the job is stopped.
+        pet.suspend_output()
+        tty_mode[:] = [termios.tcgetattr(keyboard)]
+        sys.stdout.write(FOCUS_REPORTING_OFF + term.normal_cursor + RMCUP)
+        sys.stdout.flush()
+        os.kill(os.getpid(), signal.SIGSTOP)
+
+    def continue_job():
+        if tty_mode:
+            termios.tcsetattr(keyboard, termios.TCSANOW, tty_mode.pop())
+            sys.stdout.write(SMCUP + term.hide_cursor + FOCUS_REPORTING_ON)
+            sys.stdout.flush()
+        pet.resume_output()
+        pet.fast_forward(loop.skip_elapsed())
+        pet.resize()
+        show()
+
+    def resized():
+        pet.resize()
+        loop.request_render()
+
+    events.add_reader(keyboard, read_keys)
+    events.add_signal_handler(signal.SIGINT, loop.stop)
+    events.add_signal_handler(signal.SIGTERM, loop.stop)
+    events.add_signal_handler(signal.SIGWINCH, resized)
+    events.add_signal_handler(signal.SIGTSTP, stop_job)
+    events.add_signal_handler(signal.SIGCONT, continue_job)
+    try:
+        await loop.run_async(pet.update, pet.render, pet.is_idle, pet.next_event_in)
+    finally:
+        events.remove_reader(keyboard)
+        for signum in (
+            signal.SIGINT,
+            signal.SIGTERM,
+            signal.SIGWINCH,
+            signal.SIGTSTP,
+            signal.SIGCONT,
+        ):
+            events.remove_signal_handler(signum)
+
+
+def run_headless(config, duration, time_warp):
+    from frame_output import NullFrameWriter
+    from virtual_terminal import HeadlessTerminal
+
+    pet = Pet(HeadlessTerminal(), config, stream=NullFrameWriter())
+    loop = GameLoop.from_config(config, time_warp)
+    next_report = [REPORT_INTERVAL]
+
+    def simulate(dt):
+        pet.update(dt)
+        if pet.clock.now >= next_report[0]:
+            stats = pet.stats.get_stats()
+            print(
+                f"{pet.clock.now / 3600:6.1f}h  hunger={stats['hunger']:3d} "
+                f"mood={stats['mood']:3d} energy={stats['energy']:3d}  "
+                f"{pet.state_machine.get_state_name()}"
+            )
+            next_report[0] += REPORT_INTERVAL
+        if pet.clock.now >= duration:
+            loop.stop()
+
+    start = time.perf_counter()
+    loop.run(simulate, lambda: None, time.sleep)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Simulated {pet.clock.now / 3600:.1f}h in {elapsed:.1f}s "
+        f"({loop.tick_count} ticks, {pet.clock.now / elapsed:.0f}x real time)"
+    )
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Nyan Cat terminal pet")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="record the session for replay with recording.py",
+    )
+    parser.add_argument(
+        "--time-warp",
+        type=float,
+        default=1.0,
+        metavar="N",
+        help="run the pet N times faster than real time",
+    )
+    parser.add_argument(
+        "--no-render",
+        action="store_true",
+        help="simulate without a display and print hourly stats",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=86400.0,
+        metavar="SECONDS",
+        help="simulated seconds to run with --no-render (default: one day)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="exit after the first frame and report time spent in each phase",
+    )
+    profile = StartupProfile(STARTED)
+    profile.mark("imports")
+    args = parser.parse_args()
+    profile.mark("arguments")
+
     config = load_config()
     if config is None:
         return
+    profile.mark("config")
 
-    term = Terminal()
+    if args.no_render:
+        run_headless(config, args.duration, args.time_warp)
+        return
 
-    SMCUP = "\x1b[?1049h"
-    RMCUP = "\x1b[?1049l"
+    term = Terminal()
+    profile.mark("terminal")
+    pet = None
+    store = None
+    recorder = None
+    loop = None
 
-    sys.stdout.write(SMCUP)
+    sys.stdout.write(SMCUP + FOCUS_REPORTING_ON)
     sys.stdout.flush()
 
     try:
@@ -39,43 +232,72 @@ def main():
                 )
             )
             print(term.center(term.dim + "Initializing..." + term.normal))
+            sys.stdout.flush()
 
+            if args.record:
+                from recording import SessionRecorder
+
+                # Replays start from config.yaml, so recorded sessions skip
+                # the saved pet.
+                recorder = SessionRecorder(args.record, term.width, term.height)
             pet = Pet(term, config)
+            if recorder is not None:
+                recorder.attach(pet)
+            elif args.time_warp == 1.0 and not args.profile_startup:
+                from persistence import PetStore
+
+                # A warped session would age the saved pet by hours, and a
+                # profiling run must leave it untouched.
+                store = PetStore.from_config(config)
+            if store is not None:
+                store.restore(pet)
+                pet.store = store
+            profile.mark("pet")
 
             with term.cbreak():
-                last_render_time = time.time()
-                animation_speed = config["pet"]["animation_speed"]
-                while True:
-                    key = term.inkey(timeout=0.016)
-
-                    if key:
-                        action = pet.handle_input(key)
-
-                        if action == "quit":
-                            print("\x1b[2J\x1b[H")
-                            print(
-                                term.center(
-                                    term.bold
-                                    + "Goodbye! Thanks for playing with Nyan! 😸"
-                                    + term.normal
-                                )
-                            )
-                            print(
-                                term.center(
-                                    term.dim + "Press any key to exit..." + term.normal
-                                )
-                            )
-                            term.inkey()
-                            break
-
-                    current_time = time.time()
-                    if current_time - last_render_time >= animation_speed:
-                        pet.update()
-                        last_render_time = current_time
-                        pet.render()
+                # The first frame goes out before asyncio is even imported.
+                (recorder or pet).render()
+                profile.mark("render")
+                if args.profile_startup:
+                    return
+
+                import asyncio
+
+                loop = GameLoop.from_config(config, args.time_warp)
+                asyncio.run(run_pet(term, recorder or pet, loop))
+                pet.close()
+
+                print("\x1b[2J\x1b[H")
+                print(
+                    term.center(
+                        term.bold
+                        + "Goodbye! Thanks for playing with Nyan! 😸"
+                        + term.normal
+                    )
+                )
+                print(term.center(term.dim + "Press any key to exit..." + term.normal))
+                term.inkey()
     finally:
-        sys.stdout.write(RMCUP)
+        if pet is not None:
+            pet.close()
+        if store is not None:
+            store.close(pet)
+        if recorder is not None:
+            recorder.close()
+        sys.stdout.write(FOCUS_REPORTING_OFF + RMCUP)
         sys.stdout.flush()
+        if args.profile_startup:
+            print("\n".join(profile.report()))
+
+    if loop is not None:
+        rates = loop.get_rates()
+        print(
+            f"Simulated {rates['ticks']} ticks, rendered {rates['frames']} frames "
+            f"({rates['tick_rate']:.0f} ticks/s, {rates['render_rate']:.0f} fps, "
+            f"{rates['skipped_frames']} frames skipped, {rates['wakeups']} wakeups)"
+        )
+        if rates["suspended_time"]:
+            print(f"Rendering suspended for {rates['suspended_time']:.1f}s")
 
 
 if __name__ == "__main__":
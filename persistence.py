@@ -0,0 +1,220 @@
+import os
+import queue
+import struct
+import threading
+import time
+
+SNAPSHOT_FILE = "snapshot.bin"
+JOURNAL_FILE = "journal.bin"
+SNAPSHOT_MAGIC = b"NYAN"
+# Version 2 stores the state as its StateTable (config order) index.
+SNAPSHOT_VERSION = 2
+# magic, version, saved_at, hunger, mood, energy, state, state time left,
+# cat x, cat y, direction
+SNAPSHOT_RECORD = struct.Struct("<4sBdfffBffhb")
+# timestamp, action
+JOURNAL_RECORD = struct.Struct("<dB")
+
+ACTIONS = ["feed", "play", "pet", "sleep"]
+
+
+class PetStore:
+    """Saves the pet as a periodic binary snapshot plus an interaction journal.
+
+    The game loop only captures plain values and queues them; encoding,
+    writes, fsync and the atomic snapshot rename happen on a writer thread,
+    so saving never holds up a frame.
+    """
+
+    def __init__(self, path, snapshot_interval=60.0, fsync_interval=2.0):
+        self.path = os.path.expanduser(path)
+        self.snapshot_path = os.path.join(self.path, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(self.path, JOURNAL_FILE)
+        self.snapshot_interval = snapshot_interval
+        self.fsync_interval = fsync_interval
+        self.next_snapshot = time.time() + snapshot_interval
+
+        self.snapshots_written = 0
+        self.events_written = 0
+        self.fsyncs = 0
+
+        os.makedirs(self.path, exist_ok=True)
+        self.journal = open(self.journal_path, "ab")
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_config(cls, config):
+        save_config = config.get("save") or {}
+        if not save_config.get("enabled"):
+            return None
+        return cls(
+            save_config["path"],
+            snapshot_interval=save_config["snapshot_interval"],
+            fsync_interval=save_config["fsync_interval"],
+        )
+
+    def record(self, action):
+        self.queue.put(("event", (time.time(), ACTIONS.index(action))))
+
+    def tick(self, pet):
+        if time.time() >= self.next_snapshot:
+            self.snapshot(pet)
+
+    def snapshot(self, pet):
+        self.next_snapshot = time.time() + self.snapshot_interval
+        self.queue.put(("snapshot", self._capture(pet)))
+
+    def sync(self):
+        self.queue.join()
+
+    def close(self, pet=None):
+        if pet is not None:
+            self.snapshot(pet)
+        self.queue.put(("close", None))
+        self.thread.join()
+
+    def _capture(self, pet):
+        machine = pet.state_machine
+        time_left = 0.0
+        if machine.state_duration > 0:
+            elapsed = machine.clock.now - machine.state_start_time
+            time_left = max(0.0, machine.state_duration - elapsed)
+        return (
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            time.time(),
+            pet.stats.hunger,
+            pet.stats.mood,
+            pet.stats.energy,
+            machine.state_id,
+            time_left,
+            pet.animation.cat_x,
+            pet.animation.cat_y,
+            pet.animation.direction,
+        )
+
+    def _run(self):
+        dirty = False
+        last_sync = time.monotonic()
+        while True:
+            try:
+                kind, payload = self.queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind == "event":
+                self.journal.write(JOURNAL_RECORD.pack(*payload))
+                self.journal.flush()
+                self.events_written += 1
+                dirty = True
+            elif kind == "snapshot":
+                self._write_snapshot(payload)
+                dirty = False
+            elif kind == "close":
+                if dirty:
+                    self._sync_journal()
+                self.journal.close()
+                self.queue.task_done()
+                return
+
+            if dirty and time.monotonic() - last_sync >= self.fsync_interval:
+                self._sync_journal()
+                dirty = False
+                last_sync = time.monotonic()
+            if kind is not None:
+                self.queue.task_done()
+
+    def _sync_journal(self):
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.fsyncs += 1
+
+    def _write_snapshot(self, values):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(SNAPSHOT_RECORD.pack(*values))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.fsyncs += 1
+        self.snapshots_written += 1
+
+        # Everything journaled so far is folded into the snapshot.
+        self.journal.truncate(0)
+        self.journal.seek(0)
+
+    def read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = f.read(SNAPSHOT_RECORD.size)
+        except FileNotFoundError:
+            return None
+        if len(data) < SNAPSHOT_RECORD.size:
+            return None
+        values = SNAPSHOT_RECORD.unpack(data)
+        if values[0] != SNAPSHOT_MAGIC or values[1] != SNAPSHOT_VERSION:
+            return None
+        return values
+
+    def read_journal(self):
+        with open(self.journal_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % JOURNAL_RECORD.size
+        return [
+            (timestamp, ACTIONS[action])
+            for timestamp, action in JOURNAL_RECORD.iter_unpack(data[:usable])
+        ]
+
+    def restore(self, pet, now=None):
+        """Load the snapshot and replay the journal tail into ``pet``.
+
+        Offline time between events is applied with ``Pet.fast_forward``.
+        Journal records no newer than the snapshot are already folded into
+        it (a crash can land between the snapshot rename and the journal
+        truncate) and are skipped. Returns False when there was nothing saved.
+        """
+        now = time.time() if now is None else now
+        clock = None
+        saved_at = None
+
+        snapshot = self.read_snapshot()
+        if snapshot is not None:
+            (
+                _,
+                _,
+                clock,
+                pet.stats.hunger,
+                pet.stats.mood,
+                pet.stats.energy,
+                state,
+                time_left,
+                pet.animation.cat_x,
+                pet.animation.cat_y,
+                pet.animation.direction,
+            ) = snapshot
+            saved_at = clock
+            machine = pet.state_machine
+            if state < len(machine.table.states):
+                machine.change_state(machine.table.states[state], duration=time_left)
+
+        for timestamp, action in self.read_journal():
+            if saved_at is not None and timestamp <= saved_at:
+                continue
+            if clock is not None:
+                pet.fast_forward(max(0.0, timestamp - clock))
+            pet.apply_action(action)
+            clock = timestamp
+
+        if clock is None:
+            return False
+        pet.fast_forward(max(0.0, now - clock))
+        return True
+
+    def get_stats(self):
+        return {
+            "snapshots": self.snapshots_written,
+            "events": self.events_written,
+            "fsyncs": self.fsyncs,
+        }
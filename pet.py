@@ -1,52 +1,118 @@
 import time
 import random
-import sys
 from blessed import Terminal
 from graphics import Graphics
 from animation import Animation
 from stats import Stats
 from interaction import Interaction
 from cat_state import CatStateMachine, CatState
+from renderer import DiffRenderer
+from frame_timing import FrameTimer
+from quality import BandwidthGovernor
+from clock import Clock
+from scheduler import Scheduler
+from layout import Layout
+
+STATE_INDICATORS = {
+    CatState.IDLE: ("[IDLE]", {"dim": True}),
+    CatState.WALKING: ("[WALKING]", {"dim": True}),
+    CatState.EATING: ("[EATING 🍽️]", {"fg": 220}),
+    CatState.SLEEPING: ("[SLEEPING 💤]", {"fg": 27}),
+    CatState.GROOMING: ("[GROOMING]", {"fg": 201}),
+    CatState.PLAYING: ("[PLAYING 🎮]", {"fg": 46}),
+    CatState.STRETCHING: ("[STRETCHING]", {"fg": 226}),
+    CatState.HUNGRY: ("[HUNGRY 😿]", {"fg": 196}),
+    CatState.HAPPY: ("[HAPPY 😺]", {"fg": 226}),
+    CatState.SAD: ("[SAD 😿]", {"fg": 27}),
+}
 
 
 class Pet:
-    def __init__(self, terminal: Terminal, config: dict):
+    def __init__(
+        self,
+        terminal: Terminal,
+        config: dict,
+        stream=None,
+        styles=None,
+        sprite_cache=None,
+        clock=None,
+    ):
         self.term = terminal
         self.config = config
+        self.clock = clock if clock is not None else Clock()
+        self.scheduler = Scheduler(self.clock)
 
-        self.graphics = Graphics(terminal, config)
-        self.animation = Animation(terminal, config)
-        self.stats = Stats(config)
-        self.interaction = Interaction(terminal, config)
-        self.state_machine = CatStateMachine(config)
+        self.layout = Layout(terminal)
+        self.graphics = Graphics(terminal, config, styles, sprite_cache)
+        self.graphics.resize(self.layout.field.width, self.layout.field.height)
+        self.shared_styles = styles is not None
+        self.state_machine = CatStateMachine(
+            config, self.clock, scheduler=self.scheduler
+        )
+        self.animation = Animation(
+            terminal, config, self.clock, self.state_machine.table, self.layout
+        )
+        self.stats = Stats(config, self.clock)
+        self.interaction = Interaction(terminal, config, self.clock, self.scheduler)
+        self.timer = FrameTimer()
+        self.renderer = DiffRenderer(
+            stream=stream, styles=self.graphics.styles, timer=self.timer
+        )
+        self.governor = BandwidthGovernor.from_config(config)
+        self.base_color_mode = self.graphics.styles.color_mode
+        self.state_indicators = {
+            state: (text, self.graphics.styles.style(**style))
+            for state, (text, style) in STATE_INDICATORS.items()
+        }
+
+        self.store = None
 
-        self.last_update = time.time()
-        self.random_behavior_timer = 0
+        self.last_update = time.monotonic()
         self.random_behavior_interval = random.uniform(5, 10)
+        self.random_behavior_timer = self.scheduler.call_later(
+            self.random_behavior_interval, self._random_behavior_due
+        )
         self.first_render = True
 
-    def update(self):
-        current_time = time.time()
-        dt = current_time - self.last_update
+    def update(self, dt=None):
+        self.timer.begin()
+        current_time = time.monotonic()
+        if dt is None:
+            dt = current_time - self.last_update
         self.last_update = current_time
+        self.clock.advance(dt)
+        self.scheduler.run_due()
 
         stats_data = self.stats.get_stats()
         self.state_machine.update(dt, stats_data)
 
         current_state = self.state_machine.get_state()
         self.animation.update(dt, current_state)
+        self.graphics.starfield.update(dt, self.animation.get_velocity())
 
         self.stats.update(dt)
         self.interaction.update(dt)
-        self._update_random_behavior(dt)
+        if self.store is not None:
+            self.store.tick(self)
+        self.timer.lap("simulate")
 
-    def _update_random_behavior(self, dt):
-        self.random_behavior_timer += dt
+    def fast_forward(self, elapsed):
+        self.stats.fast_forward(elapsed)
+        self.state_machine.fast_forward(elapsed, self.stats.get_stats())
+        interval = self.random_behavior_interval
+        progress = interval - (self.random_behavior_timer.when - self.clock.now)
+        self.random_behavior_timer.cancel()
+        self.random_behavior_timer = self.scheduler.call_later(
+            interval - (progress + elapsed) % interval, self._random_behavior_due
+        )
+        self.last_update = time.monotonic()
 
-        if self.random_behavior_timer >= self.random_behavior_interval:
-            self._trigger_random_behavior()
-            self.random_behavior_timer = 0
-            self.random_behavior_interval = random.uniform(5, 10)
+    def _random_behavior_due(self):
+        self._trigger_random_behavior()
+        self.random_behavior_interval = random.uniform(5, 10)
+        self.random_behavior_timer = self.scheduler.call_later(
+            self.random_behavior_interval, self._random_behavior_due
+        )
 
     def _trigger_random_behavior(self):
         current_state = self.state_machine.get_state()
@@ -69,8 +135,14 @@ class Pet:
         elif behavior == "twitch":
             self.interaction._show_message("*ear twitch*")
 
+    def apply_action(self, action):
+        getattr(self.stats, action)()
+        self.state_machine.on_action(action)
+
     def handle_input(self, key):
         action = self.interaction.handle_key(key, self.stats)
+        if self.store is not None and action in ("feed", "play", "pet", "sleep"):
+            self.store.record(action)
 
         if action == "feed":
             self.state_machine.on_feed()
@@ -84,112 +156,118 @@ class Pet:
         elif action == "sleep":
             self.state_machine.on_sleep()
             self.interaction._show_message("Nyan curls up to sleep... 💤")
+        elif action == "timing":
+            self.timer.set_enabled(self.interaction.is_timing_visible())
         elif action == "quit":
             return "quit"
 
         return None
 
+    def is_idle(self):
+        return self.animation.is_paused and not self.interaction.is_timing_visible()
+
+    def next_event_in(self):
+        deadline = self.scheduler.next_deadline()
+        if deadline is None:
+            return None
+        return deadline - self.clock.now
+
+    def invalidate(self):
+        self.renderer.invalidate()
+
+    def resize(self):
+        """Pick up a new terminal size, e.g. on SIGWINCH. The buffers are
+        reallocated now and the next frame is a full repaint."""
+        if not self.layout.refresh():
+            return False
+        self.renderer.resize(self.layout.height, self.layout.width)
+        self.graphics.resize(self.layout.field.width, self.layout.field.height)
+        return True
+
     def render(self):
+        if not self.renderer.ready() or not self.governor.should_render():
+            self.renderer.skipped_frames += 1
+            return False
+
+        self.timer.begin()
         cat_x, cat_y = self.animation.get_position()
         frame_index = self.animation.get_frame_index()
         rainbow_offset = self.animation.get_rainbow_offset()
         current_state = self.state_machine.get_state()
 
-        screen_height = self.term.height
-        screen_width = self.term.width
-
-        sys.stdout.write("\x1b[2J\x1b[H")
+        layout = self.layout
+        buffer = self.renderer.begin_frame(layout.height, layout.width)
 
-        grid = []
-        for y in range(screen_height):
-            grid.append([" "] * screen_width)
-
-        stars = self.graphics.render_stars()
-        for y, x, star in stars:
-            if 0 <= y < screen_height and 0 <= x < screen_width:
-                grid[y][x] = star
+        self.graphics.draw_stars(buffer)
 
         if current_state not in [CatState.SLEEPING, CatState.GROOMING, CatState.EATING]:
-            rainbow_tail = self.graphics.render_rainbow_tail(
-                cat_x, cat_y, 10, rainbow_offset
+            self.graphics.draw_rainbow_tail(
+                buffer,
+                cat_x,
+                cat_y,
+                self.governor.settings["tail_length"],
+                rainbow_offset,
             )
-            for y, x, segment in rainbow_tail:
-                if 0 <= y < screen_height and 0 <= x < screen_width:
-                    grid[y][x] = segment
 
-        cat_lines = self.graphics.render_cat(
-            cat_x, cat_y, frame_index, rainbow_offset, current_state
+        self.graphics.draw_cat(
+            buffer, cat_x, cat_y, frame_index, rainbow_offset, current_state
         )
-        for line_index, line in enumerate(cat_lines):
-            line_y = cat_y + line_index
-            if 0 <= line_y < screen_height:
-                for char_index, char in enumerate(line):
-                    pos_x = cat_x + char_index
-                    if 0 <= pos_x < screen_width and char != " ":
-                        colored = self.graphics.colorize_char(
-                            char, line_index, char_index, rainbow_offset
-                        )
-                        grid[line_y][pos_x] = colored
 
         stats_data = self.stats.get_stats()
-        stats_lines = self.graphics.render_stats(
-            stats_data["hunger"], stats_data["mood"], stats_data["energy"]
+        self.graphics.draw_stats(
+            buffer,
+            layout.stats.top,
+            stats_data["hunger"],
+            stats_data["mood"],
+            stats_data["energy"],
+            self.governor.describe() if self.governor.enabled else None,
         )
 
-        stats_height = len(stats_lines) + 1
-        for i, line in enumerate(stats_lines):
-            line_y = screen_height - stats_height + i
-            if 0 <= line_y < screen_height:
-                for char_index, char in enumerate(line):
-                    if char_index < screen_width:
-                        grid[line_y][char_index] = char
-
         state_indicator = self._get_state_indicator(current_state)
         if state_indicator:
-            state_y = screen_height - stats_height - 2
-            if 0 <= state_y < screen_height:
-                for char_index, char in enumerate(state_indicator):
-                    if char_index < screen_width:
-                        grid[state_y][char_index] = char
+            text, style = state_indicator
+            buffer.blit_text(layout.indicator.top, layout.indicator.left, text, style)
 
         if self.interaction.is_help_visible():
-            help_lines = self.graphics.render_help()
-            for i, line in enumerate(help_lines):
-                line_y = 2 + i
-                if 0 <= line_y < screen_height:
-                    for char_index, char in enumerate(line):
-                        if char_index < screen_width:
-                            grid[line_y][char_index] = char
+            self.graphics.draw_help(buffer, layout.help.top)
 
         message = self.interaction.get_message()
         if message:
-            message_line = self.graphics.render_message(
-                message, self.interaction.message_duration
+            self.graphics.draw_message(buffer, layout.message.top, message)
+
+        if self.interaction.is_timing_visible():
+            self.graphics.draw_timing(
+                buffer, layout.timing.top, layout.timing.left, self.timer.summary()
             )
-            message_y = screen_height - stats_height - 3
-            if 0 <= message_y < screen_height:
-                for char_index, char in enumerate(message_line):
-                    if char_index < screen_width:
-                        grid[message_y][char_index] = char
-
-        output = "\n".join("".join(row) for row in grid)
-        sys.stdout.write(output)
-        sys.stdout.flush()
+
+        self.timer.lap("compose")
+        bytes_written = self.renderer.present()
+        self.timer.end_frame(bytes_written)
+        if self.governor.record(bytes_written):
+            self._apply_quality()
         return True
 
+    def _apply_quality(self):
+        settings = self.governor.settings
+        self.graphics.starfield.twinkle = settings["twinkle"]
+        color_mode = settings["colors"]
+        if color_mode is None or self.base_color_mode != "256":
+            color_mode = self.base_color_mode
+        if not self.shared_styles and self.graphics.styles.set_color_mode(color_mode):
+            # Unchanged cells would keep the old mode's SGR otherwise.
+            self.renderer.invalidate()
+
+    def suspend_output(self):
+        self.renderer.suspend()
+
+    def resume_output(self):
+        self.renderer.resume()
+
+    def close(self):
+        self.renderer.close()
+
+    def get_render_stats(self):
+        return self.renderer.get_frame_stats()
+
     def _get_state_indicator(self, state):
-        indicators = {
-            CatState.IDLE: self.term.dim + "[IDLE]" + self.term.normal,
-            CatState.WALKING: self.term.dim + "[WALKING]" + self.term.normal,
-            CatState.EATING: self.term.color(220) + "[EATING 🍽️]" + self.term.normal,
-            CatState.SLEEPING: self.term.color(27) + "[SLEEPING 💤]" + self.term.normal,
-            CatState.GROOMING: self.term.color(201) + "[GROOMING]" + self.term.normal,
-            CatState.PLAYING: self.term.color(46) + "[PLAYING 🎮]" + self.term.normal,
-            CatState.STRETCHING: self.term.color(226)
-            + "[STRETCHING]"
-            + self.term.normal,
-            CatState.HUNGRY: self.term.color(196) + "[HUNGRY 😿]" + self.term.normal,
-            CatState.HAPPY: self.term.color(226) + "[HAPPY 😺]" + self.term.normal,
-            CatState.SAD: self.term.color(27) + "[SAD 😿]" + self.term.normal,
-        }
-        return indicators.get(state, "")
+        return self.state_indicators.get(state)
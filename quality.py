@@ -0,0 +1,118 @@
+import time
+from collections import deque
+
+QUALITY_LEVELS = [
+    {
+        "name": "full",
+        "twinkle": True,
+        "tail_length": 10,
+        "colors": None,
+        "frame_divisor": 1,
+    },
+    {
+        "name": "still stars",
+        "twinkle": False,
+        "tail_length": 10,
+        "colors": None,
+        "frame_divisor": 1,
+    },
+    {
+        "name": "short tail",
+        "twinkle": False,
+        "tail_length": 4,
+        "colors": None,
+        "frame_divisor": 1,
+    },
+    {
+        "name": "16 colors",
+        "twinkle": False,
+        "tail_length": 4,
+        "colors": "16",
+        "frame_divisor": 1,
+    },
+    {
+        "name": "half fps",
+        "twinkle": False,
+        "tail_length": 4,
+        "colors": "16",
+        "frame_divisor": 2,
+    },
+]
+RATE_WINDOW = 1.0
+DEGRADE_AFTER = 1.0
+RESTORE_AFTER = 3.0
+RESTORE_HEADROOM = 0.6
+
+
+class BandwidthGovernor:
+    """Sheds rendering cost when output exceeds a bytes-per-second budget."""
+
+    def __init__(self, budget, clock=time.monotonic):
+        self.budget = budget
+        self.clock = clock
+        self.level = 0
+        self.samples = deque()
+        self.window_bytes = 0
+        self.over_since = None
+        self.under_since = None
+        self.frame_counter = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["display"].get("max_bytes_per_second") or 0)
+
+    @property
+    def enabled(self):
+        return self.budget > 0
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    def should_render(self):
+        self.frame_counter += 1
+        return self.frame_counter % self.settings["frame_divisor"] == 0
+
+    def record(self, bytes_written):
+        if not self.enabled:
+            return False
+        now = self.clock()
+        self.samples.append((now, bytes_written))
+        self.window_bytes += bytes_written
+        while self.samples and now - self.samples[0][0] > RATE_WINDOW:
+            self.window_bytes -= self.samples.popleft()[1]
+        return self._adjust(now)
+
+    def get_rate(self):
+        return self.window_bytes / RATE_WINDOW
+
+    def _adjust(self, now):
+        rate = self.get_rate()
+        if rate > self.budget:
+            self.under_since = None
+            if self.over_since is None:
+                self.over_since = now
+            elif (
+                now - self.over_since >= DEGRADE_AFTER
+                and self.level < len(QUALITY_LEVELS) - 1
+            ):
+                self.level += 1
+                self.over_since = now
+                return True
+        elif rate < self.budget * RESTORE_HEADROOM:
+            self.over_since = None
+            if self.under_since is None:
+                self.under_since = now
+            elif now - self.under_since >= RESTORE_AFTER and self.level > 0:
+                self.level -= 1
+                self.under_since = now
+                return True
+        else:
+            self.over_since = None
+            self.under_since = None
+        return False
+
+    def describe(self):
+        return (
+            f"Quality: {self.settings['name']} ({self.level}/{len(QUALITY_LEVELS) - 1})"
+        )
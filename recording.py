@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Deterministic session recording and headless replay
+"""
+
+import argparse
+import os
+import random
+import struct
+import time
+import yaml
+from frame_output import NullFrameWriter
+from pet import Pet
+from virtual_terminal import HeadlessTerminal
+
+MAGIC = b"NYRC"
+VERSION = 3
+# magic, version, seed, start time, width, height
+HEADER = struct.Struct("<4sBQdHH")
+TICK = b"T"
+KEY = b"K"
+RENDER = b"R"
+RESIZE = b"S"
+FAST_FORWARD = b"F"
+TICK_RECORD = struct.Struct("<d")
+KEY_LENGTH = struct.Struct("<B")
+RESIZE_RECORD = struct.Struct("<HH")
+DIGEST_SIZE = 8
+
+
+def composed_frame(renderer, frames_before):
+    # A presented frame has been swapped to the front; a skipped one is
+    # still in the back buffer.
+    if renderer.frame_count != frames_before:
+        return renderer.front
+    return renderer.back
+
+
+class SessionRecorder:
+    """Records everything a pet session depends on to a compact binary log.
+
+    Seeds ``random`` and logs each tick's dt (which is all the pet's clock
+    is built from), time skipped while stopped, keys, resizes and a digest
+    of every rendered frame. Resizes and skipped time go through ``resize``
+    and ``fast_forward`` in place of the ``Pet`` methods.
+    Create it before the ``Pet`` so star placement comes from the recorded
+    seed, then ``attach`` the pet and drive it through the recorder.
+    """
+
+    def __init__(self, path, width, height, seed=None):
+        self.seed = (
+            seed if seed is not None else int.from_bytes(os.urandom(8), "little")
+        )
+        self.pet = None
+        self.frames = 0
+
+        random.seed(self.seed)
+        self.file = open(path, "wb")
+        self.file.write(
+            HEADER.pack(MAGIC, VERSION, self.seed, time.time(), width, height)
+        )
+
+    def attach(self, pet):
+        self.pet = pet
+
+    def update(self, dt=None):
+        if dt is None:
+            dt = time.monotonic() - self.pet.last_update
+        self.file.write(TICK + TICK_RECORD.pack(dt))
+        self.pet.update(dt)
+
+    def fast_forward(self, elapsed):
+        self.file.write(FAST_FORWARD + TICK_RECORD.pack(elapsed))
+        self.pet.fast_forward(elapsed)
+
+    def handle_input(self, key):
+        data = str(key).encode("utf-8")[:255]
+        self.file.write(KEY + KEY_LENGTH.pack(len(data)) + data)
+        return self.pet.handle_input(key)
+
+    def resize(self):
+        if not self.pet.resize():
+            return False
+        layout = self.pet.layout
+        self.file.write(RESIZE + RESIZE_RECORD.pack(layout.width, layout.height))
+        return True
+
+    def render(self):
+        renderer = self.pet.renderer
+        frames_before = renderer.frame_count
+        if not self.pet.render():
+            return False
+        digest = composed_frame(renderer, frames_before).digest(DIGEST_SIZE)
+        self.file.write(RENDER + digest)
+        self.frames += 1
+        return True
+
+    def invalidate(self):
+        self.pet.invalidate()
+
+    def suspend_output(self):
+        self.pet.suspend_output()
+
+    def resume_output(self):
+        self.pet.resume_output()
+
+    def is_idle(self):
+        return self.pet.is_idle()
+
+    def next_event_in(self):
+        return self.pet.next_event_in()
+
+    def close(self):
+        self.file.close()
+
+
+def read_session(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, start, width, height = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} session recording")
+
+    events = []
+    pos = HEADER.size
+    while pos < len(data):
+        kind = data[pos : pos + 1]
+        pos += 1
+        if kind in (TICK, FAST_FORWARD):
+            events.append((kind, TICK_RECORD.unpack_from(data, pos)[0]))
+            pos += TICK_RECORD.size
+        elif kind == KEY:
+            (length,) = KEY_LENGTH.unpack_from(data, pos)
+            pos += KEY_LENGTH.size
+            events.append((KEY, data[pos : pos + length].decode("utf-8")))
+            pos += length
+        elif kind == RENDER:
+            events.append((RENDER, data[pos : pos + DIGEST_SIZE]))
+            pos += DIGEST_SIZE
+        elif kind == RESIZE:
+            events.append((RESIZE, RESIZE_RECORD.unpack_from(data, pos)))
+            pos += RESIZE_RECORD.size
+        else:
+            raise ValueError(f"Corrupt session recording at byte {pos - 1}")
+    return {"seed": seed, "start": start, "size": (width, height), "events": events}
+
+
+def replay(path, config, stream=None):
+    """Re-run a recorded session headlessly as fast as possible.
+
+    Returns the frame digests produced and the index of the first frame that
+    differs from the recording (None when every frame matches).
+    """
+    session = read_session(path)
+    width, height = session["size"]
+    term = HeadlessTerminal(width, height)
+
+    random.seed(session["seed"])
+    pet = Pet(term, config, stream=stream or NullFrameWriter())
+    digests = []
+    first_mismatch = None
+    start = time.perf_counter()
+    for kind, payload in session["events"]:
+        if kind == TICK:
+            pet.update(payload)
+        elif kind == FAST_FORWARD:
+            pet.fast_forward(payload)
+        elif kind == KEY:
+            pet.handle_input(payload)
+        elif kind == RESIZE:
+            term.resize(*payload)
+            pet.resize()
+        elif kind == RENDER:
+            frames_before = pet.renderer.frame_count
+            pet.render()
+            digest = composed_frame(pet.renderer, frames_before).digest(DIGEST_SIZE)
+            if digest != payload and first_mismatch is None:
+                first_mismatch = len(digests)
+            digests.append(digest)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "frames": len(digests),
+        "digests": digests,
+        "first_mismatch": first_mismatch,
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded pet session")
+    parser.add_argument("recording")
+    args = parser.parse_args()
+
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    result = replay(args.recording, config)
+    fps = result["frames"] / result["elapsed"] if result["elapsed"] else 0.0
+    print(
+        f"Replayed {result['frames']} frames in {result['elapsed']:.2f}s "
+        f"({fps:.0f} frames/s)"
+    )
+    if result["first_mismatch"] is None:
+        print("All frames match the recording")
+    else:
+        print(f"First differing frame: {result['first_mismatch']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+from framebuffer import FrameBuffer, CONTINUATION
+from styles import StyleRegistry
+from frame_timing import FrameTimer
+from frame_output import open_frame_writer
+
+SGR_RESET = b"\x1b[0m"
+CLEAR_SCREEN = b"\x1b[2J"
+# Terminals that support synchronized output show the repaint all at once.
+SYNC_BEGIN = b"\x1b[?2026h"
+SYNC_END = b"\x1b[?2026l"
+MERGE_GAP = 4
+
+
+class DiffRenderer:
+    """Front/back buffer renderer that only emits the cells that changed."""
+
+    def __init__(self, stream=None, styles=None, timer=None):
+        self.output = open_frame_writer(stream)
+        self.styles = styles if styles is not None else StyleRegistry()
+        self.timer = timer if timer is not None else FrameTimer()
+        self.front = FrameBuffer(0, 0)
+        self.back = FrameBuffer(0, 0)
+        self.force_repaint = True
+
+        self.frame = bytearray()
+        self.glyphs = {}
+
+        self.frame_count = 0
+        self.skipped_frames = 0
+        self.last_frame_bytes = 0
+        self.last_frame_sgr = 0
+        self.total_bytes = 0
+
+    def ready(self):
+        return self.output.ready()
+
+    def begin_frame(self, height, width):
+        if not self.resize(height, width):
+            self.back.clear()
+        return self.back
+
+    def resize(self, height, width):
+        if not self.back.resize(height, width):
+            return False
+        self.front.resize(height, width)
+        self.force_repaint = True
+        return True
+
+    def invalidate(self):
+        self.force_repaint = True
+
+    def present(self):
+        if not self.output.ready():
+            self.skipped_frames += 1
+            self.last_frame_bytes = 0
+            return 0
+
+        frame = self.frame
+        del frame[:]
+        if self.force_repaint:
+            self._encode_full(frame)
+            self.force_repaint = False
+        else:
+            self._encode_diff(frame)
+        self.timer.lap("encode")
+
+        self.output.submit(frame)
+        self.timer.lap("write")
+
+        self.front, self.back = self.back, self.front
+        self.last_frame_bytes = len(frame)
+        self.total_bytes += self.last_frame_bytes
+        self.frame_count += 1
+        return self.last_frame_bytes
+
+    def suspend(self):
+        self.output.suspend()
+
+    def resume(self):
+        self.output.resume()
+
+    def close(self):
+        self.output.close()
+
+    def _glyph(self, codepoint):
+        glyph = self.glyphs.get(codepoint)
+        if glyph is None:
+            glyph = chr(codepoint).encode("utf-8")
+            self.glyphs[codepoint] = glyph
+        return glyph
+
+    def _encode_span(self, frame, start, end, style):
+        buffer = self.back
+        chars = buffer.chars
+        styles = buffer.styles
+        marks = buffer.marks
+        glyphs = self.glyphs
+        for index in range(start, end):
+            cell_style = styles[index]
+            if cell_style != style:
+                frame += self.styles.transition(style, cell_style)
+                self.last_frame_sgr += 1
+                style = cell_style
+            codepoint = chars[index]
+            if codepoint != CONTINUATION:
+                frame += glyphs.get(codepoint) or self._glyph(codepoint)
+                if marks and index in marks:
+                    frame += marks[index].encode("utf-8")
+        return style
+
+    def _encode_full(self, frame):
+        self.last_frame_sgr = 0
+        frame += SYNC_BEGIN
+        frame += CLEAR_SCREEN
+        style = 0
+        width = self.back.width
+        for y in range(self.back.height):
+            frame += b"\x1b[%d;1H" % (y + 1)
+            style = self._encode_span(frame, y * width, (y + 1) * width, style)
+        if self.styles.sequence(style):
+            frame += SGR_RESET
+            self.last_frame_sgr += 1
+        frame += SYNC_END
+
+    def _encode_diff(self, frame):
+        self.last_frame_sgr = 0
+        back = self.back
+        front = self.front
+        back_chars = back.chars
+        back_styles = back.styles
+        front_chars = front.chars
+        front_styles = front.styles
+        marks_changed = back.marks != front.marks
+        if (
+            not marks_changed
+            and back_chars == front_chars
+            and back_styles == front_styles
+        ):
+            return
+
+        style = 0
+        width = back.width
+        for y in range(back.height):
+            row_start = y * width
+            row_end = row_start + width
+            if (
+                not marks_changed
+                and back_chars[row_start:row_end] == front_chars[row_start:row_end]
+                and back_styles[row_start:row_end] == front_styles[row_start:row_end]
+            ):
+                continue
+
+            index = row_start
+            while index < row_end:
+                if not self._cell_changed(index):
+                    index += 1
+                    continue
+
+                start = index
+                if back_chars[start] == CONTINUATION and start > row_start:
+                    start -= 1
+                end = index + 1
+                gap = 0
+                index += 1
+                while index < row_end and gap <= MERGE_GAP:
+                    if self._cell_changed(index):
+                        gap = 0
+                        end = index + 1
+                    else:
+                        gap += 1
+                    index += 1
+                index = end
+
+                frame += b"\x1b[%d;%dH" % (y + 1, start - row_start + 1)
+                style = self._encode_span(frame, start, end, style)
+        if self.styles.sequence(style):
+            frame += SGR_RESET
+            self.last_frame_sgr += 1
+
+    def _cell_changed(self, index):
+        back = self.back
+        front = self.front
+        return (
+            back.chars[index] != front.chars[index]
+            or back.styles[index] != front.styles[index]
+            or back.marks.get(index) != front.marks.get(index)
+        )
+
+    def get_frame_stats(self):
+        average = self.total_bytes / self.frame_count if self.frame_count else 0
+        return {
+            "frames": self.frame_count,
+            "skipped_frames": self.skipped_frames,
+            "last_frame_bytes": self.last_frame_bytes,
+            "last_frame_sgr": self.last_frame_sgr,
+            "average_frame_bytes": int(average),
+            "total_bytes": self.total_bytes,
+        }
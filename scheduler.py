@@ -0,0 +1,53 @@
+import heapq
+import itertools
+
+
+class Timer:
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """Deadlines on a pet's clock kept in a min-heap.
+
+    Cancelled timers stay in the heap and are skipped when they reach the
+    top, so cancelling and rescheduling are both O(log n).
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.heap = []
+        self.sequence = itertools.count()
+
+    def call_at(self, when, callback, *args):
+        timer = Timer(when, callback, args)
+        heapq.heappush(self.heap, (when, next(self.sequence), timer))
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(self.clock.now + delay, callback, *args)
+
+    def run_due(self):
+        heap = self.heap
+        now = self.clock.now
+        while heap and heap[0][0] <= now:
+            timer = heapq.heappop(heap)[2]
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+
+    def next_deadline(self):
+        heap = self.heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def __len__(self):
+        return len(self.heap)
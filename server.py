@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Multi-session pet server: one asyncio loop hosting a pet per connection
+"""
+
+import argparse
+import asyncio
+import time
+import yaml
+from pet import Pet
+from styles import StyleRegistry
+from virtual_terminal import HeadlessTerminal
+
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+SE = 240
+ECHO = 1
+SUPPRESS_GO_AHEAD = 3
+NAWS = 31
+# Longest partial telnet command kept between reads; NAWS needs 9 bytes.
+MAX_PENDING = 512
+
+SESSION_START = b"\x1b[?1049h\x1b[?25l"
+SESSION_END = b"\x1b[0m\x1b[?25h\x1b[?1049l"
+NEGOTIATION = bytes([IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD, IAC, DO, NAWS])
+
+
+class TransportFrameWriter:
+    """Frame writer over an asyncio transport that honours its flow control."""
+
+    def __init__(self, transport, buffer_limit):
+        self.transport = transport
+        self.buffer_limit = buffer_limit
+        self.paused = False
+
+    def ready(self):
+        return (
+            not self.paused
+            and not self.transport.is_closing()
+            and self.transport.get_write_buffer_size() < self.buffer_limit
+        )
+
+    def submit(self, frame):
+        if frame:
+            self.transport.write(bytes(frame))
+        return len(frame)
+
+    def close(self):
+        pass
+
+
+class PetSession(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.writer = None
+        self.term = HeadlessTerminal()
+        self.pet = None
+        self.pending = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self.server.buffer_limit)
+        self.writer = TransportFrameWriter(transport, self.server.buffer_limit)
+        self.pet = Pet(
+            self.term,
+            self.server.config,
+            stream=self.writer,
+            styles=self.server.styles,
+            sprite_cache=self.server.sprite_cache,
+        )
+        transport.write(NEGOTIATION + SESSION_START)
+        self.server.sessions.add(self)
+
+    def connection_lost(self, exc):
+        self.server.sessions.discard(self)
+
+    def pause_writing(self):
+        self.writer.paused = True
+
+    def resume_writing(self):
+        self.writer.paused = False
+
+    def data_received(self, data):
+        data = self.pending + data
+        self.pending = b""
+        keys = []
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte != IAC:
+                keys.append(byte)
+                i += 1
+                continue
+            if i + 1 >= len(data):
+                self.pending = data[i:]
+                break
+            command = data[i + 1]
+            if command == IAC:
+                keys.append(IAC)
+                i += 2
+            elif command in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(data):
+                    self.pending = data[i:]
+                    break
+                i += 3
+            elif command == SB:
+                end = data.find(bytes([IAC, SE]), i + 2)
+                if end < 0:
+                    self.pending = data[i:]
+                    break
+                self._subnegotiation(data[i + 2 : end])
+                i = end + 2
+            else:
+                i += 2
+
+        if len(self.pending) > MAX_PENDING:
+            # An IAC SB that never ends; don't buffer it without limit.
+            self.close()
+            return
+        for key in bytes(keys).decode("utf-8", "ignore"):
+            if self.pet.handle_input(key) == "quit":
+                self.close()
+                return
+
+    def _subnegotiation(self, payload):
+        if len(payload) >= 5 and payload[0] == NAWS:
+            width = (payload[1] << 8) | payload[2]
+            height = (payload[3] << 8) | payload[4]
+            if width and height:
+                self.term.resize(width, height)
+                self.pet.resize()
+
+    def tick(self, dt):
+        self.pet.update(dt)
+
+    def render(self):
+        self.pet.render()
+
+    def close(self):
+        if not self.transport.is_closing():
+            self.transport.write(SESSION_END)
+            self.transport.close()
+
+
+class PetServer:
+    """Drives every connected session's pet from a single asyncio loop.
+
+    Sessions share one style registry and sprite cache, and each session's
+    renderer skips frames while its transport is backed up, so a slow client
+    never stalls the others.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        server_config = config["server"]
+        self.tick_interval = 1.0 / server_config["tick_rate"]
+        self.render_every = max(
+            1, round(server_config["tick_rate"] / server_config["render_fps"])
+        )
+        self.buffer_limit = server_config["write_buffer_limit"]
+        self.styles = StyleRegistry("256")
+        self.sprite_cache = {}
+        self.sessions = set()
+        self.tick_count = 0
+        self.busy_time = 0.0
+
+    def protocol_factory(self):
+        return PetSession(self)
+
+    async def serve(self, host=None, port=None, unix_path=None):
+        loop = asyncio.get_running_loop()
+        if unix_path:
+            server = await loop.create_unix_server(self.protocol_factory, unix_path)
+        else:
+            server = await loop.create_server(self.protocol_factory, host, port)
+        async with server:
+            await self.drive()
+
+    async def drive(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            start = time.perf_counter()
+            for session in list(self.sessions):
+                self._step(loop, session, session.tick, self.tick_interval)
+            self.tick_count += 1
+            if self.tick_count % self.render_every == 0:
+                for session in list(self.sessions):
+                    self._step(loop, session, session.render)
+            self.busy_time += time.perf_counter() - start
+
+            next_tick += self.tick_interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def _step(self, loop, session, step, *args):
+        # A session that raises is dropped alone; the rest keep running.
+        try:
+            step(*args)
+        except Exception as e:
+            self.sessions.discard(session)
+            loop.call_exception_handler(
+                {
+                    "message": "Pet session failed and was closed",
+                    "exception": e,
+                    "protocol": session,
+                }
+            )
+            session.close()
+
+    def get_stats(self):
+        return {
+            "sessions": len(self.sessions),
+            "ticks": self.tick_count,
+            "busy_time": self.busy_time,
+            "sprite_cache_entries": len(self.sprite_cache),
+        }
+
+
+def main():
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    parser = argparse.ArgumentParser(description="Host terminal pets over telnet")
+    parser.add_argument("--host", default=config["server"]["host"])
+    parser.add_argument("--port", type=int, default=config["server"]["port"])
+    parser.add_argument("--unix", dest="unix_path", help="listen on a Unix socket")
+    args = parser.parse_args()
+
+    server = PetServer(config)
+    where = args.unix_path or f"{args.host}:{args.port}"
+    print(f"Serving Nyan pets on {where} (Ctrl+C to stop)")
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix_path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
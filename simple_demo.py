@@ -66,6 +66,7 @@ def visual_demo():
             sys.stdout.write("".join(output))
             sys.stdout.flush()
 
+            animation.clock.advance(0.5)
             animation.update(0.5)
             frame_count += 1
             time.sleep(0.5)
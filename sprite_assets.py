@@ -0,0 +1,182 @@
+import hashlib
+import marshal
+import os
+from cat_state import STATE_BY_NAME
+
+SPRITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sprites")
+SPRITE_SUFFIX = ".txt"
+CACHE_FILE = ".compiled"
+CACHE_VERSION = 1
+
+RAINBOW_CHARS = frozenset("\\/|_-~^()[]{}.+*")
+# Color roles a sprite cell can take; "." in a color mask keeps the default.
+RAINBOW = 0
+FACE = 1
+BODY = 2
+COLOR_ROLES = {"r": RAINBOW, "f": FACE, "b": BODY}
+OPAQUE = "#"
+FACE_LINES = 3
+
+
+def default_role(char, line_index):
+    if char in RAINBOW_CHARS:
+        return RAINBOW
+    if line_index < FACE_LINES:
+        return FACE
+    return BODY
+
+
+def parse_sprite(text, name):
+    """Split a sprite file into frames of art lines and optional masks.
+
+    Lines before the first ``@frame`` are ignored, so files can start with
+    notes for whoever draws them.
+    """
+    frames = []
+    sequence = None
+    block = None
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.startswith("@"):
+            directive, *args = line[1:].split()
+            if directive == "frame":
+                frames.append({"art": []})
+                block = frames[-1]["art"]
+            elif directive in ("colors", "opaque"):
+                if not frames:
+                    raise ValueError(f"{name}:{number}: @{directive} before @frame")
+                block = frames[-1][directive] = []
+            elif directive == "sequence":
+                sequence = [int(arg) - 1 for arg in args]
+                block = None
+            else:
+                raise ValueError(f"{name}:{number}: unknown directive '@{directive}'")
+        elif block is not None:
+            block.append(line.rstrip())
+
+    if not frames:
+        raise ValueError(f"{name}: no @frame found")
+    for frame in frames:
+        for lines in frame.values():
+            while lines and not lines[-1]:
+                lines.pop()
+    if sequence is None:
+        sequence = list(range(len(frames)))
+    elif not sequence or not all(0 <= i < len(frames) for i in sequence):
+        raise ValueError(f"{name}: @sequence refers to a missing frame")
+    return frames, sequence
+
+
+def _pad(lines, height, width):
+    lines = [line.ljust(width) for line in lines]
+    return lines + [" " * width] * (height - len(lines))
+
+
+def compile_sprite(text, name):
+    """Compile sprite text into padded frame lines and per-line cell rows.
+
+    Each row holds ``(column, codepoint, role)`` for the cells that are
+    drawn: non-space characters, plus spaces marked ``#`` in ``@opaque``.
+    """
+    frames, sequence = parse_sprite(text, name)
+    width = max(len(line) for frame in frames for line in frame["art"])
+    height = max(len(frame["art"]) for frame in frames)
+
+    compiled = []
+    for frame in frames:
+        art = _pad(frame["art"], height, width)
+        colors = _pad(frame.get("colors", []), height, width)
+        opaque = _pad(frame.get("opaque", []), height, width)
+        rows = []
+        for line_index, line in enumerate(art):
+            row = []
+            for char_index, char in enumerate(line):
+                if char == " " and opaque[line_index][char_index] != OPAQUE:
+                    continue
+                role = COLOR_ROLES.get(colors[line_index][char_index])
+                if role is None:
+                    role = default_role(char, line_index)
+                row.append((char_index, ord(char), role))
+            rows.append(tuple(row))
+        compiled.append((tuple(art), tuple(rows)))
+    return tuple(compiled), tuple(sequence)
+
+
+class SpriteLibrary:
+    """Every ``sprites/*.txt`` file, compiled and cached as one marshal file.
+
+    Cache entries are keyed by file name and checked against the file's
+    mtime and size, so an unchanged tree loads without reading a sprite; a
+    touched file whose content hash still matches reuses its compiled form.
+    Sprites are keyed by cat state, or by file name for states that exist
+    only in config.
+    """
+
+    def __init__(self, directory=SPRITE_DIR):
+        self.directory = directory
+        self.cache_path = os.path.join(directory, CACHE_FILE)
+        self.compiled = 0
+        self.cached = 0
+        self.frames = {}
+        self.rows = {}
+        self._load()
+
+    def _load(self):
+        cache = self._read_cache()
+        entries = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(SPRITE_SUFFIX):
+                continue
+            name = filename[: -len(SPRITE_SUFFIX)]
+            path = os.path.join(self.directory, filename)
+            stat = os.stat(path)
+            entry = cache.get(name)
+            if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                with open(path, "rb") as f:
+                    data = f.read()
+                digest = hashlib.blake2b(data, digest_size=16).digest()
+                if entry is not None and entry[2] == digest:
+                    sprite = entry[3]
+                    self.cached += 1
+                else:
+                    sprite = compile_sprite(data.decode("utf-8"), filename)
+                    self.compiled += 1
+                entry = (stat.st_mtime_ns, stat.st_size, digest, sprite)
+            else:
+                self.cached += 1
+            entries[name] = entry
+
+        if entries != cache:
+            self._write_cache(entries)
+
+        for name, entry in entries.items():
+            frames, sequence = entry[3]
+            state = STATE_BY_NAME.get(name, name)
+            self.frames[state] = [frames[i][0] for i in sequence]
+            self.rows[state] = [frames[i][1] for i in sequence]
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "rb") as f:
+                version, entries = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return {}
+        if version != CACHE_VERSION:
+            return {}
+        return entries
+
+    def _write_cache(self, entries):
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(marshal.dumps((CACHE_VERSION, entries)))
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            # A read-only install still runs, it just compiles every time.
+            pass
+
+    def get_stats(self):
+        return {
+            "sprites": len(self.frames),
+            "compiled": self.compiled,
+            "cached": self.cached,
+        }
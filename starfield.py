@@ -0,0 +1,179 @@
+import math
+import random
+
+# NumPy is imported by load_numpy on first use, so it stays off the startup
+# path for the small fields most terminals have.
+np = None
+numpy_checked = False
+
+LAYER_GLYPHS = ".+*"
+TWINKLE_RATE = (0.5, 2.0)
+# A star is lit while sin(rate * t + phase) is above this, about 70% of the time.
+TWINKLE_THRESHOLD = -0.6
+# Below this many stars the plain-Python path is as fast as NumPy's.
+NUMPY_MIN_STARS = 32
+
+
+def load_numpy():
+    """Import NumPy once, returning None when it isn't installed."""
+    global np, numpy_checked
+    if not numpy_checked:
+        numpy_checked = True
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
+
+
+class Starfield:
+    """Parallax star layers filling the sky, scrolled against the cat's motion.
+
+    Star count is ``star_density`` per cell of the area given to ``resize``.
+    Layer 0 is the farthest: smallest glyph and slowest scroll, with the
+    nearest layer moving at ``star_scroll`` times the cat's speed. Twinkle is
+    a per-star phase on the simulated time, so a frame depends only on the
+    ticks before it. Positions and twinkle are computed for all stars at once
+    with NumPy, and star by star otherwise; by default NumPy is used (and
+    imported) only once a resize gives at least ``NUMPY_MIN_STARS`` stars.
+    """
+
+    def __init__(self, config, styles, seed=None, vectorized=None):
+        display = config["display"]
+        self.density = display["star_density"]
+        self.layers = display["star_layers"]
+        self.scroll = display["star_scroll"]
+        self.colors = config["colors"]["star_colors"]
+        self.styles = styles
+        self.auto = vectorized is None
+        self.vectorized = bool(vectorized)
+        if self.vectorized and load_numpy() is None:
+            raise ImportError("Vectorized starfield requires numpy (pip install numpy)")
+
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = self._make_rng()
+        self.twinkle = True
+        self.time = 0.0
+        self.width = 0
+        self.height = 0
+        self.count = 0
+
+    def _make_rng(self):
+        if self.vectorized:
+            return np.random.default_rng(self.seed)
+        return random.Random(self.seed)
+
+    def resize(self, width, height):
+        """Scatter a new field over ``width`` x ``height`` cells, with rows
+        ``width`` cells apart in the frame buffer."""
+        self.width = width
+        self.height = height
+        self.count = round(width * height * self.density) if width > 0 else 0
+        if self.auto:
+            vectorized = self.count >= NUMPY_MIN_STARS and load_numpy() is not None
+            if vectorized != self.vectorized:
+                self.vectorized = vectorized
+                self.rng = self._make_rng()
+        color_styles = [self.styles.style(fg=color) for color in self.colors]
+        glyphs = [ord(glyph) for glyph in LAYER_GLYPHS]
+
+        if self.vectorized:
+            rng = self.rng
+            layer = rng.integers(0, self.layers, self.count)
+            self.x = rng.uniform(0, max(width, 1), self.count)
+            self.row_base = rng.integers(0, max(height, 1), self.count) * width
+            self.depth = self.scroll * (layer + 1) / self.layers
+            self.rate = rng.uniform(*TWINKLE_RATE, self.count)
+            self.phase = rng.uniform(0, 2 * math.pi, self.count)
+            glyph_codes = np.array(glyphs, dtype=np.uint32)
+            self.codepoints = glyph_codes[layer * len(glyphs) // self.layers]
+            self.color_index = rng.integers(0, len(color_styles), self.count)
+            self.style_ids = np.array(color_styles, dtype=np.uint16)[self.color_index]
+        else:
+            rng = self.rng
+            layer = [rng.randrange(self.layers) for _ in range(self.count)]
+            self.x = [rng.uniform(0, max(width, 1)) for _ in range(self.count)]
+            self.row_base = [
+                rng.randrange(max(height, 1)) * width for _ in range(self.count)
+            ]
+            self.depth = [self.scroll * (i + 1) / self.layers for i in layer]
+            self.rate = [rng.uniform(*TWINKLE_RATE) for _ in range(self.count)]
+            self.phase = [rng.uniform(0, 2 * math.pi) for _ in range(self.count)]
+            self.codepoints = [glyphs[i * len(glyphs) // self.layers] for i in layer]
+            self.color_index = [
+                rng.randrange(len(color_styles)) for _ in range(self.count)
+            ]
+            self.style_ids = [color_styles[i] for i in self.color_index]
+
+    def update(self, dt, velocity=0.0):
+        """Advance twinkle by ``dt`` and scroll against a cat moving at
+        ``velocity`` columns per second."""
+        self.time += dt
+        if not velocity or not self.count:
+            return
+        shift = velocity * dt
+        if self.vectorized:
+            self.x -= shift * self.depth
+            np.mod(self.x, self.width, out=self.x)
+        else:
+            width = self.width
+            self.x = [
+                (x - shift * depth) % width for x, depth in zip(self.x, self.depth)
+            ]
+
+    def _lit(self):
+        if self.vectorized:
+            if not self.twinkle:
+                return None
+            return np.sin(self.rate * self.time + self.phase) > TWINKLE_THRESHOLD
+        if not self.twinkle:
+            return [True] * self.count
+        time = self.time
+        return [
+            math.sin(rate * time + phase) > TWINKLE_THRESHOLD
+            for rate, phase in zip(self.rate, self.phase)
+        ]
+
+    def _cells(self):
+        # x can round up to exactly width after the modulo.
+        last = self.width - 1
+        if self.vectorized:
+            return self.row_base + np.minimum(self.x.astype(np.intp), last)
+        return [base + min(int(x), last) for base, x in zip(self.row_base, self.x)]
+
+    def draw(self, buffer):
+        if not self.count or buffer.width != self.width:
+            return
+        cells = self._cells()
+        lit = self._lit()
+        if self.vectorized:
+            codepoints = self.codepoints
+            style_ids = self.style_ids
+            if lit is not None:
+                cells = cells[lit]
+                codepoints = codepoints[lit]
+                style_ids = style_ids[lit]
+            chars = np.frombuffer(buffer.chars, dtype=buffer.chars.typecode)
+            styles = np.frombuffer(buffer.styles, dtype=buffer.styles.typecode)
+            chars[cells] = codepoints
+            styles[cells] = style_ids
+        else:
+            chars = buffer.chars
+            styles = buffer.styles
+            for cell, on, codepoint, style in zip(
+                cells, lit, self.codepoints, self.style_ids
+            ):
+                if on:
+                    chars[cell] = codepoint
+                    styles[cell] = style
+
+    def visible(self):
+        """``(y, x, glyph, color)`` for each lit star."""
+        lit = self._lit()
+        stars = []
+        for i, cell in enumerate(self._cells()):
+            if lit is None or lit[i]:
+                y, x = divmod(int(cell), self.width)
+                color = self.colors[int(self.color_index[i])]
+                stars.append((y, x, chr(self.codepoints[i]), color))
+        return stars
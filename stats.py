@@ -1,9 +1,13 @@
-import time
+from clock import Clock
+
+STARVING_HUNGER = 20
+STARVING_MOOD_DECAY = 0.5
 
 
 class Stats:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, clock=None):
         self.config = config
+        self.clock = clock if clock is not None else Clock()
         stats_config = config["stats"]
 
         self.max_value = stats_config["max_value"]
@@ -13,7 +17,7 @@ class Stats:
         self.mood = stats_config["initial_mood"]
         self.energy = stats_config["initial_energy"]
 
-        self.last_update = time.time()
+        self.last_update = self.clock.now
 
     def update(self, dt):
         decay_rates = self.config["stats"]
@@ -21,13 +25,44 @@ class Stats:
         self.hunger = max(
             self.min_value, self.hunger - decay_rates["hunger_decay"] * dt
         )
-        self.mood = max(self.min_value, self.mood - decay_rates["mood_decay"] * dt)
+        mood_decay = decay_rates["mood_decay"] * dt
+        if self.hunger < STARVING_HUNGER:
+            mood_decay *= 1 + STARVING_MOOD_DECAY
+        # Clamp after the starving decay, as fast_forward does.
+        self.mood = max(self.min_value, self.mood - mood_decay)
         self.energy = max(
             self.min_value, self.energy - decay_rates["energy_decay"] * dt
         )
 
-        if self.hunger < 20:
-            self.mood -= decay_rates["mood_decay"] * dt * 0.5
+    def fast_forward(self, elapsed):
+        """Apply ``elapsed`` seconds of decay in closed form.
+
+        Matches stepping ``update`` in the small-``dt`` limit: each stat falls
+        linearly to ``min_value``, and mood falls faster from the moment
+        hunger drops below ``STARVING_HUNGER``.
+        """
+        decay_rates = self.config["stats"]
+        hunger_decay = decay_rates["hunger_decay"]
+        mood_decay = decay_rates["mood_decay"]
+
+        if self.hunger < STARVING_HUNGER:
+            fed_time = 0.0
+        elif hunger_decay > 0 and self.min_value < STARVING_HUNGER:
+            fed_time = min(elapsed, (self.hunger - STARVING_HUNGER) / hunger_decay)
+        else:
+            fed_time = elapsed
+        starving_time = elapsed - fed_time
+
+        self.hunger = max(self.min_value, self.hunger - hunger_decay * elapsed)
+        self.mood = max(
+            self.min_value,
+            self.mood
+            - mood_decay * elapsed
+            - mood_decay * STARVING_MOOD_DECAY * starving_time,
+        )
+        self.energy = max(
+            self.min_value, self.energy - decay_rates["energy_decay"] * elapsed
+        )
 
     def feed(self, amount=20):
         self.hunger = min(self.max_value, self.hunger + amount)
@@ -0,0 +1,156 @@
+COLOR_MODES = ("256", "16", "mono")
+ATTRIBUTE_CODES = {"bold": 1, "dim": 2}
+
+ANSI_16_RGB = [
+    (0, 0, 0),
+    (205, 0, 0),
+    (0, 205, 0),
+    (205, 205, 0),
+    (0, 0, 238),
+    (205, 0, 205),
+    (0, 205, 205),
+    (229, 229, 229),
+    (127, 127, 127),
+    (255, 0, 0),
+    (0, 255, 0),
+    (255, 255, 0),
+    (92, 92, 255),
+    (255, 0, 255),
+    (0, 255, 255),
+    (255, 255, 255),
+]
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+
+def xterm_rgb(color):
+    if color < 16:
+        return ANSI_16_RGB[color]
+    if color < 232:
+        color -= 16
+        return (
+            CUBE_LEVELS[color // 36],
+            CUBE_LEVELS[(color // 6) % 6],
+            CUBE_LEVELS[color % 6],
+        )
+    level = 8 + (color - 232) * 10
+    return (level, level, level)
+
+
+def nearest_ansi_16(color):
+    if color < 16:
+        return color
+    r, g, b = xterm_rgb(color)
+    return min(
+        range(16),
+        key=lambda i: (ANSI_16_RGB[i][0] - r) ** 2
+        + (ANSI_16_RGB[i][1] - g) ** 2
+        + (ANSI_16_RGB[i][2] - b) ** 2,
+    )
+
+
+def detect_color_mode(terminal):
+    if terminal is None or not terminal.does_styling:
+        return "mono"
+    if terminal.number_of_colors >= 256:
+        return "256"
+    if terminal.number_of_colors >= 8:
+        return "16"
+    return "mono"
+
+
+class StyleRegistry:
+    """Interns (fg, bg, attrs) combinations as small integer style ids."""
+
+    def __init__(self, color_mode="256"):
+        self.color_mode = color_mode
+        self.ids = {(None, None, frozenset()): 0}
+        self.specs = [(None, None, frozenset())]
+        self.sequences = [""]
+        self.transitions = {}
+
+    @classmethod
+    def for_terminal(cls, terminal):
+        return cls(detect_color_mode(terminal))
+
+    def style(self, fg=None, bg=None, bold=False, dim=False):
+        attrs = frozenset(
+            name for name, enabled in (("bold", bold), ("dim", dim)) if enabled
+        )
+        key = (fg, bg, attrs)
+        style_id = self.ids.get(key)
+        if style_id is None:
+            style_id = len(self.specs)
+            self.ids[key] = style_id
+            self.specs.append(key)
+            self.sequences.append(self._build_sequence(key))
+        return style_id
+
+    def sequence(self, style_id):
+        return self.sequences[style_id]
+
+    def set_color_mode(self, color_mode):
+        if color_mode == self.color_mode:
+            return False
+        self.color_mode = color_mode
+        self.sequences = [self._build_sequence(spec) for spec in self.specs]
+        self.transitions.clear()
+        return True
+
+    def transition(self, current, target):
+        key = (current, target)
+        sequence = self.transitions.get(key)
+        if sequence is None:
+            sequence = self._build_transition(current, target).encode("ascii")
+            self.transitions[key] = sequence
+        return sequence
+
+    def _build_transition(self, current, target):
+        if self.sequences[current] == self.sequences[target]:
+            return ""
+        if not self.sequences[target]:
+            return "\x1b[0m"
+        current_fg, current_bg, current_attrs = self._effective(current)
+        target_fg, target_bg, target_attrs = self._effective(target)
+        if (
+            not current_attrs <= target_attrs
+            or (current_fg is not None and target_fg is None)
+            or (current_bg is not None and target_bg is None)
+        ):
+            return self._sgr(["0"] + self._params(self.specs[target]))
+
+        params = [str(ATTRIBUTE_CODES[a]) for a in sorted(target_attrs - current_attrs)]
+        if target_fg != current_fg:
+            params += self._color_params(target_fg, False)
+        if target_bg != current_bg:
+            params += self._color_params(target_bg, True)
+        return self._sgr(params) if params else ""
+
+    def _effective(self, style_id):
+        fg, bg, attrs = self.specs[style_id]
+        if self.color_mode == "mono":
+            return None, None, attrs
+        return fg, bg, attrs
+
+    def _build_sequence(self, spec):
+        params = self._params(spec)
+        return self._sgr(params) if params else ""
+
+    def _params(self, spec):
+        fg, bg, attrs = spec
+        params = [str(ATTRIBUTE_CODES[a]) for a in sorted(attrs)]
+        if self.color_mode != "mono":
+            params += self._color_params(fg, False)
+            params += self._color_params(bg, True)
+        return params
+
+    def _color_params(self, color, background):
+        if color is None:
+            return []
+        if self.color_mode == "256":
+            return ["48" if background else "38", "5", str(color)]
+        ansi = nearest_ansi_16(color)
+        base = (40 if background else 30) if ansi < 8 else (100 if background else 90)
+        return [str(base + ansi % 8)]
+
+    def _sgr(self, params):
+        return "\x1b[" + ";".join(params) + "m"
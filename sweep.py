@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep: headless Stats + CatStateMachine runs across a process pool
+"""
+
+import argparse
+import copy
+import csv
+import io
+import itertools
+import json
+import os
+import random
+import time
+import yaml
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cat_state import CatStateMachine, CatState, StateTable
+from clock import Clock
+from stats import Stats
+
+ACTIONS = ["feed", "pet", "sleep"]
+HUNGRY = CatState.HUNGRY.value
+SAD = CatState.SAD.value
+
+
+def parse_range(text):
+    """``0.3:0.7:5`` is five evenly spaced values, ``0.3,0.5`` a list."""
+    if ":" in text:
+        start, stop, count = text.split(":")
+        start, stop, count = float(start), float(stop), int(count)
+        if count == 1:
+            return [start]
+        step = (stop - start) / (count - 1)
+        return [round(start + step * i, 10) for i in range(count)]
+    return [yaml.safe_load(value) for value in text.split(",")]
+
+
+def expand_grid(params, seeds):
+    names = list(params)
+    for values in itertools.product(*(params[name] for name in names)):
+        for seed in range(seeds):
+            yield dict(zip(names, values)), seed
+
+
+def run_key(overrides, seed):
+    return json.dumps({"params": overrides, "seed": seed}, sort_keys=True)
+
+
+def result_fields(config, names):
+    """Columns of a ``simulate`` row for overrides of the ``names`` keys,
+    with a fraction column for each state in config."""
+    return (
+        ["key", "seed", *names]
+        + [f"{state}_fraction" for state in StateTable(config).names]
+        + ["first_hungry_s"]
+        + [f"{action}_per_hour" for action in ACTIONS]
+    )
+
+
+def apply_overrides(config, overrides):
+    config = copy.deepcopy(config)
+    for dotted, value in overrides.items():
+        section = config
+        *path, name = dotted.split(".")
+        for part in path:
+            section = section[part]
+        section[name] = value
+    return config
+
+
+def simulate(config, overrides, seed, duration, dt):
+    """Run one pet for ``duration`` simulated seconds with a caretaker.
+
+    The caretaker feeds the cat once it has been HUNGRY, and pets it once it
+    has been SAD, for ``caretaker.reaction_delay`` seconds; it puts the cat
+    to sleep as soon as energy crosses ``nap_threshold``. The interaction
+    counts are what a player would need to keep up.
+    """
+    config = apply_overrides(config, overrides)
+    random.seed(seed)
+    behaviors = config["behaviors"]
+    reaction_delay = config["caretaker"]["reaction_delay"]
+
+    clock = Clock()
+    stats = Stats(config, clock)
+    machine = CatStateMachine(config, clock)
+    occupancy = dict.fromkeys(machine.table.names, 0.0)
+    actions = dict.fromkeys(ACTIONS, 0)
+    first_hungry = None
+    # When the caretaker first saw the need for each action, until it acts.
+    noticed = {"feed": None, "pet": None}
+
+    for _ in range(int(duration / dt)):
+        clock.advance(dt)
+        machine.update(dt, stats.get_stats())
+        stats.update(dt)
+        state = machine.get_state_name()
+        occupancy[state] += dt
+        if state == HUNGRY and first_hungry is None:
+            first_hungry = clock.now
+        for action, need in (("feed", HUNGRY), ("pet", SAD)):
+            if state == need and noticed[action] is None:
+                noticed[action] = clock.now
+
+        waited = {
+            action: seen is not None and clock.now - seen >= reaction_delay
+            for action, seen in noticed.items()
+        }
+        if waited["feed"]:
+            stats.feed()
+            machine.on_feed()
+            actions["feed"] += 1
+            noticed["feed"] = None
+        elif waited["pet"]:
+            stats.pet()
+            machine.on_pet()
+            actions["pet"] += 1
+            noticed["pet"] = None
+        elif stats.energy < behaviors["nap_threshold"]:
+            stats.sleep()
+            machine.on_sleep()
+            actions["sleep"] += 1
+
+    hours = clock.now / 3600
+    row = {"key": run_key(overrides, seed), "seed": seed}
+    row.update(overrides)
+    for state, seconds in occupancy.items():
+        row[f"{state}_fraction"] = round(seconds / clock.now, 6)
+    row["first_hungry_s"] = first_hungry
+    for action in ACTIONS:
+        row[f"{action}_per_hour"] = round(actions[action] / hours, 3)
+    return row
+
+
+class ResultWriter:
+    """Appends finished runs to a JSON-lines or CSV file, one flush per run.
+
+    Resuming drops a partial last row left by an interrupted sweep, and a
+    CSV file is only resumed when its header matches ``fields``.
+    """
+
+    def __init__(self, path, fields=None):
+        self.path = path
+        self.csv = path.endswith(".csv")
+        self.fields = fields
+        self.done = self._load_done()
+        self.file = open(path, "a", newline="")
+        self.writer = None
+
+    def _load_done(self):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, "r+b") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                # Rows are written whole, so an unterminated line is a write
+                # the sweep died in; cut it so the next row starts cleanly.
+                f.truncate(complete)
+        text = data[:complete].decode("utf-8")
+
+        if self.csv:
+            reader = csv.DictReader(io.StringIO(text, newline=""))
+            if reader.fieldnames is None:
+                return set()
+            if self.fields is not None and reader.fieldnames != self.fields:
+                raise ValueError(
+                    f"{self.path} has columns {reader.fieldnames}, not {self.fields}; "
+                    "use a new output file for a different parameter set"
+                )
+            self.fields = reader.fieldnames
+            return {row["key"] for row in reader}
+
+        done = set()
+        lines = text.splitlines()
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                done.add(json.loads(line)["key"])
+            except ValueError:
+                if number < len(lines):
+                    raise
+        return done
+
+    def write(self, row):
+        if self.csv:
+            if self.writer is None:
+                fields = self.fields if self.fields is not None else list(row)
+                self.writer = csv.DictWriter(self.file, fieldnames=fields)
+                if self.file.tell() == 0:
+                    self.writer.writeheader()
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+        self.done.add(row["key"])
+
+    def close(self):
+        self.file.close()
+
+
+def run_sweep(config, params, output, seeds=1, duration=86400.0, dt=0.5, workers=None):
+    results = ResultWriter(output, result_fields(config, list(params)))
+    grid = list(expand_grid(params, seeds))
+    pending = [
+        (overrides, seed)
+        for overrides, seed in grid
+        if run_key(overrides, seed) not in results.done
+    ]
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(simulate, config, overrides, seed, duration, dt)
+                for overrides, seed in pending
+            ]
+            for finished, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                results.write(row)
+                print(f"[{finished}/{len(futures)}] {row['key']}")
+    finally:
+        results.close()
+    return {
+        "runs": len(pending),
+        "skipped": len(grid) - len(pending),
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep config.yaml values over headless pet simulations"
+    )
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="KEY=RANGE",
+        help="e.g. stats.hunger_decay=0.3:0.7:5 or behaviors.hungry_threshold=20,30",
+    )
+    parser.add_argument("--output", default="sweep.jsonl", help=".jsonl or .csv")
+    parser.add_argument("--seeds", type=int, default=1, help="runs per combination")
+    parser.add_argument("--hours", type=float, default=24.0, help="simulated hours")
+    parser.add_argument("--dt", type=float, default=0.5, help="tick length")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open("config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+
+    params = {}
+    for spec in args.param:
+        key, _, values = spec.partition("=")
+        params[key] = parse_range(values)
+
+    summary = run_sweep(
+        config,
+        params,
+        args.output,
+        seeds=args.seeds,
+        duration=args.hours * 3600,
+        dt=args.dt,
+        workers=args.workers,
+    )
+    print(
+        f"Finished {summary['runs']} runs in {summary['elapsed']:.1f}s "
+        f"({summary['skipped']} already in {args.output})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from graphics import Graphics
 from animation import Animation
 from stats import Stats
 from interaction import Interaction
+from cat_state import CatState
 
 
 def test_imports():
@@ -38,6 +39,42 @@ def test_config():
         return None
 
 
+def test_config_cache(config):
+    """Test the compiled config cache and its invalidation"""
+    print("\n✓ Testing compiled config cache...")
+
+    import os
+    import shutil
+    import tempfile
+    from config_cache import load_config, cache_path
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.yaml")
+        shutil.copy("config.yaml", path)
+        assert load_config(path) == config
+        assert os.path.exists(cache_path(path))
+        assert load_config(path) == config
+        print("✓ Config compiled on first load and read back from the cache")
+
+        with open(path) as f:
+            text = f.read()
+        with open(path, "w") as f:
+            f.write(text.replace("tick_rate: 20", "tick_rate: 25", 1))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert load_config(path)["pet"]["tick_rate"] == 25
+        print("✓ Editing config.yaml invalidates the cache")
+
+        with open(path, "w") as f:
+            f.write("pet:\n  name: Nyan\n")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        try:
+            load_config(path)
+            assert False, "incomplete config was accepted"
+        except ValueError as e:
+            print(f"✓ Invalid config rejected: {e}")
+
+
 def test_graphics(term, config):
     """Test graphics module"""
     print("\n✓ Testing graphics module...")
@@ -46,13 +83,92 @@ def test_graphics(term, config):
     print(f"✓ Graphics initialized with {len(graphics.cat_frames)} cat frames")
     print(f"✓ Rainbow colors: {graphics.colors['rainbow_gradient']}")
 
+    first = graphics.render_cat_cells(0, 7)
+    assert graphics.render_cat_cells(0, 7) is first
+    cache_stats = graphics.get_sprite_cache_stats()
+    print(
+        f"✓ Sprite cache: {cache_stats['entries']} entries, "
+        f"hit rate {cache_stats['hit_rate']:.0%}"
+    )
+
     return graphics
 
 
+def test_sprites(term, config):
+    """Test sprite asset compilation, masks and the compiled cache"""
+    print("\n✓ Testing sprite assets...")
+
+    import os
+    import tempfile
+    from sprite_assets import SpriteLibrary, RAINBOW, FACE, BODY
+
+    sprite = "\n".join(
+        [
+            "Notes for the artist are ignored",
+            "@frame",
+            " /\\",
+            "(o o)",
+            "@colors",
+            " bb",
+            "..r",
+            "@opaque",
+            "",
+            "  #",
+            "@frame",
+            " /\\",
+            "(- -)",
+            "@sequence 1 2 1",
+        ]
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "napping.txt")
+        with open(path, "w") as f:
+            f.write(sprite)
+
+        library = SpriteLibrary(directory)
+        assert library.get_stats()["compiled"] == 1
+        frames = library.frames["napping"]
+        assert len(frames) == 3 and frames[0] is frames[2]
+        assert frames[1] == (" /\\  ", "(- -)")
+        rows = library.rows["napping"][0]
+        assert rows[0] == ((1, ord("/"), BODY), (2, ord("\\"), BODY))
+        assert rows[1] == (
+            (0, ord("("), RAINBOW),
+            (1, ord("o"), FACE),
+            (2, ord(" "), RAINBOW),
+            (3, ord("o"), FACE),
+            (4, ord(")"), RAINBOW),
+        )
+        print("✓ Color and opaque masks compiled into sprite cells")
+
+        assert SpriteLibrary(directory).get_stats()["compiled"] == 0
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert SpriteLibrary(directory).get_stats() == {
+            "sprites": 1,
+            "compiled": 0,
+            "cached": 1,
+        }
+        with open(path, "w") as f:
+            f.write(sprite.replace("o o", "O O"))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        assert SpriteLibrary(directory).get_stats()["compiled"] == 1
+        print("✓ Compiled cache survives touches and rebuilds on edits")
+
+    graphics = Graphics(term, config)
+    assert graphics.sprites is Graphics(term, config).sprites
+    print(f"✓ {graphics.sprites.get_stats()['sprites']} sprites shared by instances")
+    return graphics.sprites
+
+
 def test_stats(config):
     """Test stats module"""
     print("\n✓ Testing stats module...")
 
+    import copy
+    from cat_state import CatStateMachine, StateTable
+    from clock import Clock
+
     stats = Stats(config)
     stats_data = stats.get_stats()
     print(
@@ -62,6 +178,98 @@ def test_stats(config):
     stats.feed(20)
     print(f"✓ After feeding: Hunger={stats.get_stats()['hunger']}")
 
+    dt = 0.05
+    for hunger, elapsed in ((25, 60.0), (80, 150.0), (10, 20.0), (80, 600.0)):
+        stepped = Stats(config)
+        stepped.hunger = hunger
+        jumped = Stats(config)
+        jumped.hunger = hunger
+        for _ in range(int(elapsed / dt)):
+            stepped.update(dt)
+        jumped.fast_forward(elapsed)
+        for name in ("hunger", "mood", "energy"):
+            assert abs(getattr(stepped, name) - getattr(jumped, name)) < 0.01
+    print("✓ Closed-form fast-forward matches stepped decay within 0.01")
+
+    # Coarse ticks across starvation and down to the floor: the starving
+    # decay must be clamped with the rest, not pushed below min_value.
+    for elapsed in (150.0, 400.0):
+        stepped = Stats(config)
+        jumped = Stats(config)
+        for _ in range(int(elapsed)):
+            stepped.update(1.0)
+        jumped.fast_forward(elapsed)
+        assert stepped.mood >= stepped.min_value
+        for name in ("hunger", "mood", "energy"):
+            assert abs(getattr(stepped, name) - getattr(jumped, name)) < 1e-6
+    print("✓ Fast-forward matches 1 s ticks through starvation")
+
+    offline = Stats(config)
+    offline.fast_forward(86400.0)
+    assert offline.get_stats() == {"hunger": 0, "mood": 0, "energy": 0}
+    print(f"✓ A day offline: {offline.get_stats()}")
+
+    machine = CatStateMachine(config)
+    machine.on_feed()
+    machine.fast_forward(1.0, stats.get_stats())
+    assert machine.get_state() == CatState.EATING
+    machine.fast_forward(3600.0, offline.get_stats())
+    assert machine.get_state() == CatState.SLEEPING
+    print(f"✓ State machine fast-forwards to {machine.get_state().value}")
+
+    # Left alone without random behaviors, stepping and fast-forwarding
+    # through starvation settle in the same state.
+    quiet = copy.deepcopy(config)
+    quiet["state_machine"]["random_behaviors"] = []
+    for elapsed, expected in ((150, CatState.HUNGRY), (400, CatState.SLEEPING)):
+        clock = Clock()
+        stepped = Stats(quiet, clock)
+        stepped_machine = CatStateMachine(quiet, clock)
+        for _ in range(elapsed):
+            clock.advance(1.0)
+            stepped.update(1.0)
+            stepped_machine.update(1.0, stepped.get_stats())
+        jumped = Stats(quiet)
+        jumped.fast_forward(elapsed)
+        jumped_machine = CatStateMachine(quiet)
+        jumped_machine.fast_forward(elapsed, jumped.get_stats())
+        assert stepped_machine.get_state() == jumped_machine.get_state() == expected
+    print("✓ State machine fast-forward agrees with stepped updates")
+
+    clock = Clock()
+    machine = CatStateMachine(config, clock)
+    machine.on_feed()
+    for _ in range(11):
+        clock.advance(0.25)
+        machine.update(0.25, stats.get_stats())
+    assert machine.get_state() == CatState.EATING
+    clock.advance(0.25)
+    machine.update(0.25, stats.get_stats())
+    assert machine.get_state() == CatState.IDLE
+    print("✓ Eating ends after exactly 3.0s of clock time")
+
+    table = StateTable(config)
+    assert table.states[table.default] == CatState.IDLE
+    assert table.animation_speed[table.index[CatState.PLAYING]] == 0.2
+    machine = CatStateMachine(config, clock, table)
+    clock.advance(2.0)
+    machine.update(0.0, {"hunger": 10, "mood": 50, "energy": 50})
+    assert machine.get_state() == CatState.HUNGRY
+    print(
+        f"✓ Compiled {len(table.transitions)} transitions over {len(table.names)} states"
+    )
+
+    custom = copy.deepcopy(config)
+    custom["cat_states"]["zonked"] = {"animation_speed": 2.0, "movement_speed": 0.0}
+    custom["state_machine"]["transitions"].insert(
+        0, {"to": "zonked", "when": "energy < 5", "duration": 10.0}
+    )
+    machine = CatStateMachine(custom, clock)
+    clock.advance(2.0)
+    machine.update(0.0, {"hunger": 50, "mood": 50, "energy": 2})
+    assert machine.get_state() == "zonked" and machine.get_animation_speed() == 2.0
+    print("✓ A state added in config alone is entered by its guard")
+
     return stats
 
 
@@ -69,9 +277,23 @@ def test_animation(term, config):
     """Test animation module"""
     print("\n✓ Testing animation module...")
 
+    import random
+
     animation = Animation(term, config)
     print(f"✓ Animation initialized at position {animation.get_position()}")
 
+    # Zoomie flips are a rate per second, not a chance per tick.
+    random.seed(6)
+    for dt in (0.05, 0.5):
+        zooming = Animation(term, config)
+        flips = 0
+        for _ in range(int(5000 / dt)):
+            direction = zooming.direction
+            zooming.update(dt, CatState.PLAYING)
+            flips += zooming.direction != direction
+        assert 140 < flips < 260  # ZOOMIE_FLIP_RATE * 5000 s = 200
+    print("✓ Zoomie direction flips at the same rate for any tick length")
+
     return animation
 
 
@@ -86,6 +308,802 @@ def test_interaction(term, config):
     return interaction
 
 
+def test_renderer():
+    """Test diff renderer only emits changed cells"""
+    print("\n✓ Testing diff renderer...")
+
+    import io
+    from renderer import DiffRenderer
+
+    renderer = DiffRenderer(io.StringIO())
+    buffer = renderer.begin_frame(24, 80)
+    buffer.blit_text(0, 0, "NYAN")
+    full_bytes = renderer.present()
+
+    buffer = renderer.begin_frame(24, 80)
+    buffer.blit_text(0, 0, "NYAN")
+    assert renderer.present() == 0
+
+    buffer = renderer.begin_frame(24, 80)
+    buffer.blit_text(0, 0, "NYAN")
+    buffer.put(10, 40, ord("*"))
+    diff_bytes = renderer.present()
+    assert 0 < diff_bytes < full_bytes
+    print(f"✓ Full frame: {full_bytes} bytes, one-cell diff: {diff_bytes} bytes")
+
+    buffer = renderer.begin_frame(24, 80)
+    buffer.blit_text(0, 0, "NYAN")
+    red = renderer.styles.style(fg=196)
+    buffer.blit_bar(12, 0, 10, 10, red, red, fill="=")
+    renderer.present()
+    assert renderer.last_frame_sgr == 2
+    print(f"✓ 10 coloured cells encoded with {renderer.last_frame_sgr} SGR changes")
+
+    return renderer
+
+
+def test_styles():
+    """Test style registry interning and colour fallback"""
+    print("\n✓ Testing style registry...")
+
+    from styles import StyleRegistry
+
+    styles = StyleRegistry("256")
+    red = styles.style(fg=196)
+    assert styles.style(fg=196) == red
+    print(f"✓ 256-colour red: {styles.sequence(red)!r}")
+
+    styles.set_color_mode("16")
+    print(f"✓ 16-colour red: {styles.sequence(red)!r}")
+
+    styles.set_color_mode("mono")
+    assert styles.sequence(red) == ""
+    print("✓ Mono mode drops colours")
+
+    return styles
+
+
+def test_game_loop():
+    """Test fixed-timestep loop pacing with a simulated clock"""
+    print("\n✓ Testing game loop...")
+
+    from game_loop import GameLoop
+
+    now = [0.0]
+    loop = GameLoop(tick_rate=20, render_fps=30, clock=lambda: now[0])
+    ticks = []
+
+    def wait(timeout):
+        now[0] += timeout
+        if now[0] >= 2.0:
+            loop.stop()
+
+    loop.run(ticks.append, lambda: None, wait)
+    rates = loop.get_rates()
+    assert all(dt == 0.05 for dt in ticks)
+    assert 39 <= rates["ticks"] <= 41 and 59 <= rates["frames"] <= 61
+    print(f"✓ 2 simulated seconds: {rates['ticks']} ticks, {rates['frames']} frames")
+
+    now = [0.0]
+    loop = GameLoop(tick_rate=20, render_fps=30, time_warp=50, clock=lambda: now[0])
+    ticks = []
+    loop.run(ticks.append, lambda: None, wait)
+    rates = loop.get_rates()
+    assert all(dt == 0.05 for dt in ticks)
+    assert 1990 <= rates["ticks"] <= 2010 and 59 <= rates["frames"] <= 61
+    print(f"✓ 50x time warp: {rates['ticks']} ticks in 2 real seconds")
+
+    import asyncio
+
+    def run_for(seconds, idle, fps=30):
+        loop = GameLoop(tick_rate=20, render_fps=fps, idle_fps=2)
+        ticks = []
+
+        async def drive():
+            asyncio.get_running_loop().call_later(seconds, loop.stop)
+            await loop.run_async(ticks.append, lambda: None, lambda: idle)
+
+        asyncio.run(drive())
+        return loop.get_rates(), ticks
+
+    rates, ticks = run_for(1.2, idle=True)
+    assert rates["wakeups"] <= 4 and len(ticks) >= 15
+    print(f"✓ Idle 1.2s: {len(ticks)} ticks in {rates['wakeups']} wakeups")
+
+    rates, ticks = run_for(0.5, idle=False)
+    assert rates["wakeups"] >= 15
+    print(f"✓ Active half second: {rates['wakeups']} wakeups")
+
+    loop = GameLoop(tick_rate=20, render_fps=1, idle_fps=1)
+    frames = []
+
+    async def press_key():
+        events = asyncio.get_running_loop()
+        events.call_later(0.1, loop.request_render)
+        events.call_later(0.2, loop.stop)
+        await loop.run_async(lambda dt: None, lambda: frames.append(loop.clock()))
+
+    start = loop.clock()
+    asyncio.run(press_key())
+    assert len(frames) == 2 and frames[1] - start < 0.15
+    print(f"✓ Render requested mid-interval after {frames[1] - start:.3f}s")
+
+    now = [0.0]
+    loop = GameLoop(tick_rate=20, render_fps=30, idle_fps=2, clock=lambda: now[0])
+    ticks = []
+    frames = []
+
+    def hide_then_show(timeout):
+        now[0] += timeout
+        if now[0] >= 1.0 and not loop.suspended and not loop.suspended_time:
+            loop.suspend()
+        elif now[0] >= 3.0 and loop.suspended:
+            loop.resume()
+        elif now[0] >= 4.0:
+            loop.stop()
+
+    loop.run(ticks.append, lambda: frames.append(now[0]), hide_then_show)
+    rates = loop.get_rates()
+    assert not [t for t in frames if 1.0 < t < 3.0]
+    assert 79 <= len(ticks) <= 81
+    assert abs(rates["suspended_time"] - 2.0) < 0.1
+    print(
+        f"✓ Suspended {rates['suspended_time']:.1f}s: {len(ticks)} ticks, "
+        f"no frames until resumed"
+    )
+
+    now[0] = 10.0
+    assert abs(loop.skip_elapsed() - 6.0) < 0.1 and loop.skip_elapsed() == 0.0
+    print("✓ Time spent stopped is handed back for fast-forwarding")
+
+    return loop
+
+
+def test_headless(config):
+    """Test the --no-render simulation, including a config-only state"""
+    print("\n✓ Testing headless simulation...")
+
+    import contextlib
+    import io
+    import random
+    from main import run_headless
+
+    # Left alone in a config-only default state, apart from the pet's own
+    # short random stretches.
+    zonked = with_zonked_state(config)
+    machine = zonked["state_machine"]
+    machine["default"] = "zonked"
+    machine["transitions"] = []
+    machine["random_behaviors"] = []
+    random.seed(3)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        run_headless(zonked, 3600, 1e6)
+    report = output.getvalue().splitlines()
+    assert report[0].endswith("zonked") and report[-1].startswith("Simulated 1.0h")
+    print(f"✓ {report[-1]}")
+
+    return report
+
+
+def test_scheduler(term, config):
+    """Test deadline ordering, cancellation and message expiry"""
+    print("\n✓ Testing scheduler...")
+
+    from clock import Clock
+    from scheduler import Scheduler
+
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    fired = []
+    scheduler.call_later(3.0, fired.append, "c")
+    scheduler.call_later(1.0, fired.append, "a")
+    scheduler.call_later(2.0, fired.append, "b").cancel()
+    assert scheduler.next_deadline() == 1.0
+    clock.advance(2.5)
+    scheduler.run_due()
+    assert fired == ["a"] and scheduler.next_deadline() == 3.0
+    print("✓ Due timers fire in deadline order, cancelled ones are skipped")
+
+    interaction = Interaction(term, config, clock, scheduler)
+    interaction._show_message("*meow*")
+    assert interaction.message_expires_in() == 2.0
+    clock.advance(2.0)
+    interaction.update(2.0)
+    assert interaction.get_message() == "" and interaction.message_expires_in() is None
+    print("✓ Messages expire on their deadline")
+
+    from frame_output import NullFrameWriter
+    from pet import Pet
+    from virtual_terminal import HeadlessTerminal
+
+    pet = Pet(HeadlessTerminal(), config, stream=NullFrameWriter())
+    pending = pet.next_event_in()
+    assert 0 < pending <= 10.0
+    print(f"✓ Pet's next deadline in {pending:.1f}s with {len(pet.scheduler)} timers")
+
+    return scheduler
+
+
+def test_virtual_terminal(config):
+    """Test rendering the pet headlessly into the virtual terminal"""
+    print("\n✓ Testing virtual terminal...")
+
+    from pet import Pet
+    from virtual_terminal import VirtualTerminal
+
+    term = VirtualTerminal(80, 24)
+    pet = Pet(term, config, stream=term)
+    for _ in range(20):
+        pet.update(0.1)
+        pet.render()
+
+    assert term.find("NYAN CAT STATUS") == (18, 0)
+    front = pet.renderer.front
+    for y in range(term.height):
+        expected = "".join(
+            front.cell_text(y * front.width + x) for x in range(front.width)
+        )
+        assert term.line(y) == expected
+    print(f"✓ Screen matches frame buffer after 20 frames")
+    print(f"✓ Bytes written: {term.bytes_written}, escapes: {term.escape_count}")
+
+    return term
+
+
+def test_layout(config):
+    """Test cached layout, resize handling and size reads per frame"""
+    print("\n✓ Testing layout...")
+
+    from frame_output import NullFrameWriter
+    from pet import Pet
+    from renderer import SYNC_BEGIN, CLEAR_SCREEN
+    from virtual_terminal import HeadlessTerminal
+
+    class CountingTerminal(HeadlessTerminal):
+        size_reads = 0
+
+        @property
+        def width(self):
+            CountingTerminal.size_reads += 1
+            return self._width
+
+        @width.setter
+        def width(self, value):
+            self._width = value
+
+        @property
+        def height(self):
+            CountingTerminal.size_reads += 1
+            return self._height
+
+        @height.setter
+        def height(self, value):
+            self._height = value
+
+    term = CountingTerminal(80, 24)
+    pet = Pet(term, config, stream=NullFrameWriter())
+    pet.update(0.05)
+    pet.render()
+    CountingTerminal.size_reads = 0
+    for _ in range(50):
+        pet.update(0.05)
+        pet.render()
+    assert CountingTerminal.size_reads == 0
+    print("✓ 50 ticks and frames without reading the terminal size")
+
+    assert pet.layout.stats.top == 18 and pet.layout.message.top == 15
+    assert not pet.resize()
+    term.resize(100, 30)
+    assert pet.resize() and pet.renderer.front.width == 100
+    pet.render()
+    assert pet.renderer.frame.startswith(SYNC_BEGIN + CLEAR_SCREEN)
+    assert pet.layout.stats.top == 24 and pet.layout.timing.left == 54
+    print(f"✓ Resize to 100x30 laid out again with one full repaint")
+    return pet.layout
+
+
+def test_starfield(config):
+    """Test starfield scaling, parallax scrolling and both update paths"""
+    print("\n✓ Testing starfield...")
+
+    import subprocess
+    import sys
+    from framebuffer import FrameBuffer
+    from starfield import NUMPY_MIN_STARS, Starfield, load_numpy
+    from styles import StyleRegistry
+
+    modes = [False, True] if load_numpy() is not None else [False]
+    for vectorized in modes:
+        starfield = Starfield(config, StyleRegistry(), seed=7, vectorized=vectorized)
+        starfield.resize(80, 15)
+        small = starfield.count
+        starfield.resize(400, 120)
+        assert small == 7 and starfield.count == 288
+
+        before = list(starfield.x)
+        starfield.update(0.5, 4.0)
+        moved = [(old - new) % 400 for old, new in zip(before, starfield.x)]
+        depths = sorted(set(float(depth) for depth in starfield.depth))
+        assert len(depths) == 3
+        assert all(
+            abs(shift - 2.0 * depth) < 1e-6
+            for shift, depth in zip(moved, starfield.depth)
+        )
+
+        buffer = FrameBuffer(130, 400)
+        starfield.twinkle = False
+        starfield.draw(buffer)
+        lit = [i for i, char in enumerate(buffer.chars) if char != ord(" ")]
+        assert len(lit) == len(set(int(cell) for cell in starfield._cells()))
+        assert max(lit) < 120 * 400
+        starfield.twinkle = True
+        assert 0 < len(starfield.visible()) < starfield.count
+        print(
+            f"✓ {'NumPy' if vectorized else 'Python'} starfield: {starfield.count} "
+            f"stars at 400x120, {len(depths)} layers scrolling against the cat"
+        )
+
+    # By default a small field stays on plain Python and NumPy is left
+    # unimported until a resize brings enough stars.
+    starfield = Starfield(config, StyleRegistry(), seed=7)
+    starfield.resize(80, 15)
+    assert not starfield.vectorized
+    starfield.resize(400, 120)
+    assert starfield.vectorized == (len(modes) == 2)
+    assert starfield.count >= NUMPY_MIN_STARS
+    check = "import sys, pet; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", check], check=True)
+    print("✓ Importing the pet leaves NumPy unloaded")
+    return starfield
+
+
+def test_frame_timing():
+    """Test frame phase timing percentiles and the disabled no-op path"""
+    print("\n✓ Testing frame timing...")
+
+    from frame_timing import FrameTimer, percentile
+
+    now = [0.0]
+    reads = []
+
+    def clock():
+        reads.append(now[0])
+        return now[0]
+
+    timer = FrameTimer(window=100, clock=clock)
+    timer.begin()
+    timer.lap("simulate")
+    timer.end_frame(10)
+    assert not reads and all(row[1:] == (0.0,) * 4 for row in timer.summary())
+    print("✓ Disabled timer reads no clock and records nothing")
+
+    timer.set_enabled(True)
+    for frame in range(1, 101):
+        timer.begin()
+        now[0] += frame / 1000
+        timer.lap("simulate")
+        now[0] += 0.002
+        timer.lap("compose")
+        timer.lap("encode")
+        timer.lap("write")
+        timer.end_frame(frame * 100)
+
+    rows = {row[0]: row[1:] for row in timer.summary()}
+    last, p50, p95, p99 = rows["simulate"]
+    assert abs(last - 100) < 1e-6 and abs(p50 - 51) < 1e-6
+    assert abs(p95 - 96) < 1e-6 and abs(p99 - 100) < 1e-6
+    assert abs(rows["compose"][1] - 2) < 1e-6 and rows["encode"][1] < 1e-6
+    assert abs(rows["total"][1] - 53) < 1e-6
+    assert rows["bytes"] == (10000, 5100, 9600, 10000)
+    assert percentile([], 0.5) == 0.0
+    print(f"✓ Simulate p50/p95/p99: {p50:.0f}/{p95:.0f}/{p99:.0f} ms")
+
+    timer.set_enabled(False)
+    assert all(row[1:] == (0.0,) * 4 for row in timer.summary())
+    print("✓ Disabling clears the samples")
+
+    return timer
+
+
+def test_frame_output():
+    """Test frame writer drops frames while the fd is backed up"""
+    print("\n✓ Testing frame output...")
+
+    import fcntl
+    import os
+    import time
+    from frame_output import FrameWriter
+
+    read_fd, write_fd = os.pipe()
+    writer = FrameWriter(write_fd)
+    frame = bytearray(b"=" * 200000)
+    writer.submit(frame)
+    assert writer.pending and not writer.ready()
+    print(f"✓ Backlogged with {len(writer.pending)} bytes pending")
+
+    while not writer.ready():
+        os.read(read_fd, 65536)
+    print("✓ Writer ready again after the reader drained the pipe")
+
+    writer.suspend()
+    assert not fcntl.fcntl(write_fd, fcntl.F_GETFL) & os.O_NONBLOCK
+    writer.resume()
+    assert fcntl.fcntl(write_fd, fcntl.F_GETFL) & os.O_NONBLOCK
+    print("✓ Suspending hands back a blocking fd until resumed")
+
+    writer.close()
+
+    # A reader that never drains must not hang close.
+    writer = FrameWriter(write_fd)
+    writer.submit(frame)
+    start = time.monotonic()
+    writer.close(timeout=0.1)
+    assert time.monotonic() - start < 1.0 and not writer.pending
+    assert not fcntl.fcntl(write_fd, fcntl.F_GETFL) & os.O_NONBLOCK
+    print("✓ Close gives up on a stuck reader and restores the fd flags")
+
+    os.close(read_fd)
+    os.close(write_fd)
+    return writer
+
+
+def test_quality(config):
+    """Test bandwidth governor degrades and restores quality"""
+    print("\n✓ Testing bandwidth governor...")
+
+    from quality import BandwidthGovernor
+
+    now = [0.0]
+    governor = BandwidthGovernor(1000, clock=lambda: now[0])
+    for _ in range(40):
+        now[0] += 0.1
+        governor.record(500)
+    degraded = governor.level
+    assert degraded > 0
+    print(f"✓ Over budget: {governor.describe()}")
+
+    for _ in range(200):
+        now[0] += 0.1
+        governor.record(10)
+    assert governor.level == 0
+    print(f"✓ Headroom restored: {governor.describe()}")
+
+    # Changing the color mode repaints every cell, not just changed ones.
+    from frame_output import NullFrameWriter
+    from pet import Pet
+    from virtual_terminal import HeadlessTerminal
+
+    pet = Pet(HeadlessTerminal(80, 24), config, stream=NullFrameWriter())
+    pet.renderer.force_repaint = False
+    for level, repaint in ((2, False), (3, True), (4, False), (0, True)):
+        pet.governor.level = level
+        pet._apply_quality()
+        assert pet.renderer.force_repaint == repaint
+        pet.renderer.force_repaint = False
+    print("✓ Color mode changes force a full repaint")
+
+    return governor
+
+
+def test_colony(config):
+    """Test vectorized colony stats match the scalar Stats model"""
+    print("\n✓ Testing colony simulation...")
+
+    import copy
+    import colony as colony_module
+
+    if colony_module.np is None:
+        print("- Skipping colony test (numpy not installed)")
+        return None
+
+    colony = colony_module.Colony(config, 1000, seed=1)
+    stats = Stats(config)
+    for _ in range(2400):
+        colony.step(0.05)
+        stats.update(0.05)
+
+    assert abs(colony.hunger[0] - stats.hunger) < 1e-6
+    assert abs(colony.mood[0] - stats.mood) < 1e-6
+    assert sum(colony.state_counts().values()) == 1000
+    print(
+        f"✓ 1000 pets after 2 minutes: {colony.state_counts()[CatState.HUNGRY]} hungry"
+    )
+
+    # Thresholds come from config, not from copies in the colony.
+    changed = copy.deepcopy(config)
+    changed["behaviors"]["hungry_threshold"] = 0
+    calm = colony_module.Colony(changed, 1000, seed=1)
+    for _ in range(2400):
+        calm.step(0.05)
+    assert calm.state_counts()[CatState.HUNGRY] == 0
+    print("✓ Colony transitions follow the configured thresholds")
+
+    return colony
+
+
+def with_zonked_state(config):
+    """``config`` plus a state that exists only in config, entered when the
+    cat runs out of energy."""
+    import copy
+
+    custom = copy.deepcopy(config)
+    custom["cat_states"]["zonked"] = {"animation_speed": 2.0, "movement_speed": 0.0}
+    custom["state_machine"]["transitions"].insert(
+        0, {"to": "zonked", "when": "energy < 25", "not_from": ["zonked"]}
+    )
+    return custom
+
+
+def test_sweep(config):
+    """Test a small parameter sweep streams results and resumes"""
+    print("\n✓ Testing parameter sweep...")
+
+    import json
+    import os
+    import tempfile
+    from sweep import parse_range, result_fields, run_sweep, simulate
+
+    assert parse_range("0.2:0.6:3") == [0.2, 0.4, 0.6]
+    assert parse_range("20,30") == [20, 30]
+
+    output = os.path.join(tempfile.mkdtemp(), "sweep.jsonl")
+    params = {"stats.hunger_decay": [0.2, 1.0]}
+    summary = run_sweep(config, params, output, duration=3600, dt=1.0, workers=2)
+    with open(output) as f:
+        rows = sorted(
+            (json.loads(line) for line in f), key=lambda row: row["stats.hunger_decay"]
+        )
+    assert summary["runs"] == 2 and len(rows) == 2
+    assert rows[1]["feed_per_hour"] > rows[0]["feed_per_hour"]
+    assert abs(sum(v for k, v in rows[0].items() if k.endswith("_fraction")) - 1) < 1e-3
+    print(
+        f"✓ Feeds per hour at decay 0.2 vs 1.0: "
+        f"{rows[0]['feed_per_hour']} vs {rows[1]['feed_per_hour']}"
+    )
+
+    fast = simulate(config, {"stats.hunger_decay": 1.0}, 0, 3600, 1.0)
+    assert fast["first_hungry_s"] is not None and fast["hungry_fraction"] > 0
+    print(
+        f"✓ The caretaker lets the cat get hungry: first at {fast['first_hungry_s']}s"
+    )
+
+    zonked = with_zonked_state(config)
+    row = simulate(zonked, {"stats.energy_decay": 1.0}, 0, 3600, 1.0)
+    assert list(row) == result_fields(zonked, ["stats.energy_decay"])
+    assert row["zonked_fraction"] > 0
+    print(f"✓ Config-only state tracked: zonked_fraction={row['zonked_fraction']}")
+
+    params["stats.hunger_decay"].append(0.6)
+    summary = run_sweep(config, params, output, duration=3600, dt=1.0, workers=2)
+    assert summary["runs"] == 1 and summary["skipped"] == 2
+    print("✓ Rerun resumed, simulating only the new combination")
+
+    # An interrupted sweep leaves half a row behind.
+    with open(output, "a") as f:
+        f.write('{"key": "{\\"params\\": {\\"stats.hun')
+    summary = run_sweep(config, params, output, duration=3600, dt=1.0, workers=2)
+    assert summary["runs"] == 0 and summary["skipped"] == 3
+    with open(output) as f:
+        assert len([json.loads(line) for line in f]) == 3
+    print("✓ A truncated last row is dropped on resume")
+
+    csv_output = os.path.join(tempfile.mkdtemp(), "sweep.csv")
+    run_sweep(config, params, csv_output, duration=600, dt=1.0, workers=2)
+    with open(csv_output) as f:
+        header = f.readline().strip().split(",")
+    assert header == result_fields(config, list(params))
+    with open(csv_output, "a") as f:
+        f.write('"{""params""')
+    summary = run_sweep(config, params, csv_output, duration=600, dt=1.0, workers=2)
+    assert summary["skipped"] == 3
+    try:
+        run_sweep(config, {"stats.mood_decay": [0.3]}, csv_output, duration=600)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("resumed a CSV with a different parameter set")
+    print("✓ CSV resume refuses a file with different columns")
+
+    return summary
+
+
+def test_persistence(config):
+    """Test snapshot plus journal save and restore"""
+    print("\n✓ Testing persistence...")
+
+    import os
+    import tempfile
+    import time
+    from pet import Pet
+    from persistence import PetStore, SNAPSHOT_RECORD, JOURNAL_RECORD
+    from virtual_terminal import VirtualTerminal
+
+    path = tempfile.mkdtemp()
+    term = VirtualTerminal(80, 24)
+    pet = Pet(term, config, stream=term)
+    pet.store = PetStore(path)
+    pet.stats.hunger = 40
+    pet.store.snapshot(pet)
+    for key in "fft":
+        pet.handle_input(key)
+    pet.store.sync()
+    assert os.path.getsize(os.path.join(path, "snapshot.bin")) == SNAPSHOT_RECORD.size
+    assert os.path.getsize(os.path.join(path, "journal.bin")) == 3 * JOURNAL_RECORD.size
+    print(f"✓ {SNAPSHOT_RECORD.size}-byte snapshot plus 3 journaled events")
+
+    # Simulate a crash: restore from disk without a closing snapshot.
+    restored = Pet(term, config, stream=term)
+    store = PetStore(path)
+    assert store.restore(restored)
+    store.close()
+    assert pet.stats.hunger == 80 and abs(restored.stats.hunger - 80) < 0.1
+    assert restored.state_machine.get_state() == CatState.HAPPY
+    print(f"✓ Journal replayed onto snapshot: hunger={restored.stats.hunger:.0f}")
+
+    # A crash between the snapshot rename and the journal truncate leaves
+    # events the new snapshot already includes.
+    journal_path = os.path.join(path, "journal.bin")
+    with open(journal_path, "rb") as f:
+        old_journal = f.read()
+    pet.store.snapshot(pet)
+    pet.store.sync()
+    with open(journal_path, "wb") as f:
+        f.write(old_journal)
+    restored = Pet(term, config, stream=term)
+    store = PetStore(path)
+    assert store.restore(restored)
+    store.close()
+    assert abs(restored.stats.hunger - 80) < 0.1
+    print("✓ Journal records older than the snapshot are not applied twice")
+
+    pet.store.close(pet)
+    assert os.path.getsize(journal_path) == 0
+    later = Pet(term, config, stream=term)
+    store = PetStore(path)
+    assert store.restore(later, now=time.time() + 3600)
+    store.close()
+    assert later.stats.hunger == 0
+    print(f"✓ Restored an hour later: {later.stats.get_stats()}")
+
+    # Version 1 snapshots numbered states in CatState order; reject them.
+    snapshot_path = os.path.join(path, "snapshot.bin")
+    with open(snapshot_path, "r+b") as f:
+        f.seek(4)
+        f.write(bytes([1]))
+    store = PetStore(path)
+    assert store.read_snapshot() is None
+    store.close()
+    print("✓ Snapshots from an older version are ignored")
+
+    return pet.store
+
+
+def test_recording(config):
+    """Test recording a session and replaying it frame for frame"""
+    print("\n✓ Testing record and replay...")
+
+    import os
+    import random
+    import tempfile
+    import time
+    from frame_output import NullFrameWriter
+    from pet import Pet
+    from recording import SessionRecorder, replay
+    from virtual_terminal import HeadlessTerminal
+
+    path = os.path.join(tempfile.mkdtemp(), "session.rec")
+    term = HeadlessTerminal(100, 30)
+    recorder = SessionRecorder(path, term.width, term.height, seed=1234)
+    pet = Pet(term, config, stream=NullFrameWriter())
+    recorder.attach(pet)
+    for frame in range(120):
+        recorder.update(0.05)
+        if frame in (10, 40, 70):
+            recorder.handle_input("fps"[frame // 30])
+        if frame == 60:
+            term.resize(80, 24)
+            recorder.resize()
+        if frame == 90:
+            recorder.fast_forward(3 * 3600)
+        recorder.render()
+    recorder.close()
+    print(f"✓ Recorded {recorder.frames} frames in {os.path.getsize(path)} bytes")
+
+    result = replay(path, config)
+    assert result["frames"] == 120 and result["first_mismatch"] is None
+    assert len(set(result["digests"])) > 1
+    print(f"✓ Replay reproduced all {result['frames']} frame hashes")
+
+    # Recording a stopped job must not change what the pet does.
+    random.seed(1234)
+    unrecorded = Pet(HeadlessTerminal(100, 30), config, stream=NullFrameWriter())
+    for frame in range(120):
+        unrecorded.update(0.05)
+        if frame in (10, 40, 70):
+            unrecorded.handle_input("fps"[frame // 30])
+        if frame == 90:
+            unrecorded.fast_forward(3 * 3600)
+    assert unrecorded.stats.get_stats() == pet.stats.get_stats()
+    assert unrecorded.state_machine.get_state() == pet.state_machine.get_state()
+    print(f"✓ Fast-forward recorded as-is: {pet.state_machine.get_state().name}")
+
+    data = bytearray(open(path, "rb").read())
+    data[-1] ^= 0xFF
+    with open(path, "wb") as f:
+        f.write(data)
+    assert replay(path, config)["first_mismatch"] == 119
+    print("✓ A changed frame is reported by index")
+
+    return result
+
+
+def test_server(config):
+    """Test a pet session over the asyncio server's Unix socket"""
+    print("\n✓ Testing pet server...")
+
+    import asyncio
+    import os
+    import tempfile
+    from server import PetServer, NEGOTIATION, IAC, SB, SE, NAWS
+    from virtual_terminal import VirtualTerminal
+
+    async def session():
+        server = PetServer(config)
+        path = os.path.join(tempfile.mkdtemp(), "pet.sock")
+        serve = asyncio.ensure_future(server.serve(unix_path=path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(bytes([IAC, SB, NAWS, 0, 100, 0, 30, IAC, SE]))
+        await asyncio.sleep(0.5)
+        data = await reader.read(1 << 20)
+
+        # One session failing must not stop the others.
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context)
+        )
+        failing_reader, _ = await asyncio.open_unix_connection(path)
+        await asyncio.sleep(0.1)
+        failing = next(s for s in server.sessions if s.term.width != 100)
+
+        def fail(dt):
+            raise RuntimeError("boom")
+
+        failing.pet.update = fail
+        await failing_reader.read()
+        await reader.read(1 << 20)
+        await asyncio.sleep(0.2)
+        survived = await reader.read(1 << 20)
+        assert len(errors) == 1 and failing not in server.sessions
+        assert survived and len(server.sessions) == 1
+
+        # An unterminated subnegotiation is cut off, not buffered forever.
+        flood_reader, flood_writer = await asyncio.open_unix_connection(path)
+        flood_writer.write(bytes([IAC, SB, NAWS]) + b"x" * 4096)
+        await flood_reader.read()
+
+        writer.write(b"q")
+        closed = await reader.read()
+
+        serve.cancel()
+        return server, data, closed
+
+    server, data, closed = asyncio.run(session())
+    assert data.startswith(NEGOTIATION)
+    term = VirtualTerminal(100, 30)
+    term.write(data[len(NEGOTIATION) :])
+    assert term.find("NYAN CAT STATUS") is not None
+    assert closed.endswith(b"\x1b[?1049l")
+    print(f"✓ Session rendered {len(data)} bytes at 100x30 and quit cleanly")
+    print("✓ A failing session is dropped while the others keep rendering")
+    print("✓ An endless subnegotiation closes its session")
+
+    return server
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "=" * 50)
@@ -101,10 +1119,28 @@ def run_all_tests():
 
         term = Terminal()
 
+        test_config_cache(config)
         graphics = test_graphics(term, config)
+        sprites = test_sprites(term, config)
         stats = test_stats(config)
         animation = test_animation(term, config)
         interaction = test_interaction(term, config)
+        renderer = test_renderer()
+        styles = test_styles()
+        loop = test_game_loop()
+        headless = test_headless(config)
+        scheduler = test_scheduler(term, config)
+        virtual_term = test_virtual_terminal(config)
+        layout = test_layout(config)
+        starfield = test_starfield(config)
+        timer = test_frame_timing()
+        writer = test_frame_output()
+        governor = test_quality(config)
+        colony = test_colony(config)
+        sweep = test_sweep(config)
+        store = test_persistence(config)
+        replayed = test_recording(config)
+        server = test_server(config)
 
         print("\n" + "=" * 50)
         print("✓ ALL TESTS PASSED!")
@@ -0,0 +1,212 @@
+import codecs
+import re
+from wcwidth import wcwidth, wcswidth
+
+TOKEN_PATTERN = re.compile(r"\x1b\[([0-9;?]*)([@-~])|\x1b[()][0-9A-Za-z]|\x1b[=>78]")
+BLANK_CELL = (" ", None, None, frozenset())
+
+
+class HeadlessTerminal:
+    """The subset of the blessed ``Terminal`` interface that ``Pet`` and
+    ``Graphics`` use, for terminals that are not the process's own TTY."""
+
+    does_styling = True
+    normal = "\x1b[m"
+    bold = "\x1b[1m"
+    dim = "\x1b[2m"
+
+    def __init__(self, width=80, height=24, number_of_colors=256):
+        self.width = width
+        self.height = height
+        self.number_of_colors = number_of_colors
+
+    def color(self, color):
+        return f"\x1b[38;5;{color}m"
+
+    def on_color(self, color):
+        return f"\x1b[48;5;{color}m"
+
+    def move(self, y, x):
+        return f"\x1b[{y + 1};{x + 1}H"
+
+    def center(self, text):
+        visible = wcswidth(TOKEN_PATTERN.sub("", text))
+        left = max(0, (self.width - visible) // 2)
+        right = max(0, self.width - visible - left)
+        return " " * left + text + " " * right
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+
+
+class VirtualTerminal(HeadlessTerminal):
+    """In-process terminal that parses the escape sequences the pet emits.
+
+    Doubles as the output stream for ``DiffRenderer``, so the real render
+    path can be asserted on and measured without a TTY.
+    """
+
+    def __init__(self, width=80, height=24, number_of_colors=256):
+        super().__init__(width, height, number_of_colors)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.pending = ""
+
+        self.cursor_y = 0
+        self.cursor_x = 0
+        self.fg = None
+        self.bg = None
+        self.attrs = frozenset()
+        self.cells = [[BLANK_CELL] * width for _ in range(height)]
+
+        self.bytes_written = 0
+        self.escape_count = 0
+        self.sgr_count = 0
+        self.write_count = 0
+        self.frame_marks = (0, 0, 0)
+
+    def resize(self, width, height):
+        self.cells = [
+            (row[:width] + [BLANK_CELL] * max(0, width - len(row)))
+            for row in self.cells[:height]
+        ]
+        self.cells += [[BLANK_CELL] * width for _ in range(height - len(self.cells))]
+        super().resize(width, height)
+        self.cursor_y = min(self.cursor_y, height - 1)
+        self.cursor_x = min(self.cursor_x, width - 1)
+
+    def write(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self.bytes_written += len(data)
+            data = self.decoder.decode(bytes(data))
+        else:
+            self.bytes_written += len(data.encode("utf-8"))
+        self.write_count += 1
+        self._feed(self.pending + data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _feed(self, data):
+        pos = 0
+        for match in TOKEN_PATTERN.finditer(data):
+            if match.start() > pos:
+                self._print(data[pos : match.start()])
+            self.escape_count += 1
+            if match.group(2):
+                self._csi(match.group(1), match.group(2))
+            pos = match.end()
+        tail = data[pos:]
+        escape = tail.find("\x1b")
+        if escape >= 0 and len(tail) - escape < 32:
+            self._print(tail[:escape])
+            self.pending = tail[escape:]
+        else:
+            self._print(tail)
+            self.pending = ""
+
+    def _csi(self, params, final):
+        if final == "m":
+            self.sgr_count += 1
+            self._sgr(params)
+        elif final in "Hf":
+            parts = [int(p) if p else 1 for p in params.split(";")] if params else []
+            row = parts[0] if parts else 1
+            col = parts[1] if len(parts) > 1 else 1
+            self.cursor_y = min(max(row - 1, 0), self.height - 1)
+            self.cursor_x = min(max(col - 1, 0), self.width - 1)
+        elif final == "J" and params in ("2", "3"):
+            self.cells = [[BLANK_CELL] * self.width for _ in range(self.height)]
+        elif final == "K":
+            row = self.cells[self.cursor_y]
+            row[self.cursor_x :] = [BLANK_CELL] * (self.width - self.cursor_x)
+
+    def _sgr(self, params):
+        codes = [int(p) if p else 0 for p in params.split(";")] if params else [0]
+        attrs = set(self.attrs)
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                self.fg = None
+                self.bg = None
+                attrs.clear()
+            elif code == 1:
+                attrs.add("bold")
+            elif code == 2:
+                attrs.add("dim")
+            elif code == 22:
+                attrs.discard("bold")
+                attrs.discard("dim")
+            elif 30 <= code <= 37:
+                self.fg = code - 30
+            elif 90 <= code <= 97:
+                self.fg = code - 90 + 8
+            elif 40 <= code <= 47:
+                self.bg = code - 40
+            elif 100 <= code <= 107:
+                self.bg = code - 100 + 8
+            elif code == 39:
+                self.fg = None
+            elif code == 49:
+                self.bg = None
+            elif code in (38, 48) and i + 2 < len(codes) and codes[i + 1] == 5:
+                if code == 38:
+                    self.fg = codes[i + 2]
+                else:
+                    self.bg = codes[i + 2]
+                i += 2
+            i += 1
+        self.attrs = frozenset(attrs)
+
+    def _print(self, text):
+        for char in text:
+            if char == "\n":
+                self.cursor_y = min(self.cursor_y + 1, self.height - 1)
+                self.cursor_x = 0
+                continue
+            if char == "\r":
+                self.cursor_x = 0
+                continue
+            char_width = wcwidth(char)
+            if char_width < 0:
+                continue
+            row = self.cells[self.cursor_y]
+            if char_width == 0:
+                if self.cursor_x > 0:
+                    prev = row[self.cursor_x - 1]
+                    row[self.cursor_x - 1] = (prev[0] + char,) + prev[1:]
+                continue
+            if self.cursor_x >= self.width:
+                continue
+            row[self.cursor_x] = (char, self.fg, self.bg, self.attrs)
+            if char_width == 2 and self.cursor_x + 1 < self.width:
+                row[self.cursor_x + 1] = ("", self.fg, self.bg, self.attrs)
+            self.cursor_x += char_width
+
+    def cell(self, y, x):
+        return self.cells[y][x]
+
+    def line(self, y):
+        return "".join(cell[0] for cell in self.cells[y])
+
+    def screen_text(self):
+        return [self.line(y).rstrip() for y in range(self.height)]
+
+    def find(self, text):
+        for y in range(self.height):
+            x = self.line(y).find(text)
+            if x >= 0:
+                return y, x
+        return None
+
+    def take_frame_stats(self):
+        marks = (self.bytes_written, self.escape_count, self.sgr_count)
+        previous = self.frame_marks
+        self.frame_marks = marks
+        return {
+            "bytes": marks[0] - previous[0],
+            "escapes": marks[1] - previous[1],
+            "sgr": marks[2] - previous[2],
+        }
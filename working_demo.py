@@ -53,6 +53,7 @@ def visual_demo():
             print("\n".join(output_lines), end="")
             sys.stdout.flush()
 
+            animation.clock.advance(0.05)
             animation.update(0.05)
             frame_count += 1
             time.sleep(0.05)